@@ -0,0 +1,92 @@
+# backend/app/benchmarks/bench_keywords.py
+"""Microbenchmark: compiled single-pass keyword matcher vs. the old per-keyword scans.
+
+Besides texts built from the fixed seed sentences, every text of the "unique" rows carries a
+reference number, a name and an address made of words never seen before, as real complaints do.
+
+Run with:  python -m app.benchmarks.bench_keywords
+"""
+import random
+import re
+import string
+import timeit
+
+from app import nlp
+
+SENTENCES = [
+    "Water leakage from main pipe near the school.",
+    "Streetlight not working for the past week.",
+    "Garbage not collected regularly in our area.",
+    "Power outage in our street during night.",
+    "Road filled with potholes, vehicles keep slipping.",
+    "Sewage overflow creating foul smell.",
+    "Electric meter malfunctioning, high bill received.",
+    "No proper drainage near market area.",
+    "We have complained several times to the ward office without any response.",
+    "Residents including senior citizens and children are facing difficulties every day.",
+    "Kindly look into this matter and take the necessary action at the earliest.",
+]
+URGENT_SENTENCE = "This is a danger to everyone, urgent attention needed."
+
+
+def legacy_department(text):
+    t = text.lower()
+    counts = {}
+    for dept, kws in nlp.DEPT_KEYWORDS.items():
+        for k in kws:
+            if k in t:
+                counts[dept] = counts.get(dept, 0) + 1
+    if counts:
+        return max(counts.items(), key=lambda x: x[1])[0]
+    return "General Administration"
+
+
+def legacy_urgency(text):
+    t = text.lower()
+    for w in nlp.URGENT_WORDS:
+        if re.search(r'\b' + re.escape(w) + r'\b', t):
+            return "High"
+    if re.search(r'\b(minor|small|not urgent|low priority)\b', t):
+        return "Low"
+    return "Medium"
+
+
+def make_text(rng, n_sentences):
+    """Long complaint text built from seed-style sentences; one in five texts is urgent"""
+    parts = [rng.choice(SENTENCES) for _ in range(n_sentences)]
+    if rng.random() < 0.2:
+        parts.insert(rng.randrange(len(parts) + 1), URGENT_SENTENCE)
+    return " ".join(parts)
+
+
+def _word(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10))).capitalize()
+
+
+def make_unique_text(rng, n_sentences):
+    """make_text plus a reference number, reporter name and address of unseen words"""
+    return (
+        f"{make_text(rng, n_sentences)} Ref {rng.randrange(10 ** 8)}. Reported by {_word(rng)} {_word(rng)}, "
+        f"{rng.randint(1, 999)} {_word(rng)} Street, {_word(rng)} Nagar."
+    )
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'text':>7} {'chars':>7} {'legacy us':>10} {'matcher us':>11} {'speedup':>8}")
+    cases = [(kind, build, n) for kind, build in (("seed", make_text), ("unique", make_unique_text)) for n in (1, 10, 100, 1000)]
+    for kind, build, n_sentences in cases:
+        # short texts: many distinct ones, so nothing in the matcher can get by on repeats
+        texts = [build(rng, n_sentences) for _ in range(2000 if n_sentences == 1 else 20)]
+        for t in texts:
+            assert nlp.classify_rules(t) == (legacy_department(t), legacy_urgency(t))
+        number = max(1, 2000 // n_sentences) if n_sentences > 1 else 20
+        legacy = timeit.timeit(lambda: [(legacy_department(t), legacy_urgency(t)) for t in texts], number=number)
+        new = timeit.timeit(lambda: [nlp.classify_rules(t) for t in texts], number=number)
+        per = number * len(texts)
+        chars = sum(len(t) for t in texts) // len(texts)
+        print(f"{kind:>7} {chars:>7} {legacy / per * 1e6:>10.1f} {new / per * 1e6:>11.1f} {legacy / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# backend/app/benchmarks/loadtest.py
+"""Load test: p50/p99 latency of /analyze and /complaints with sync vs. async DB sessions.
+
+Starts one uvicorn server per mode (SGCRS_DB_MODE=sync|async) on a scratch copy of the
+database, fires concurrent requests with httpx and prints a latency table.
+
+Run with:  python -m app.benchmarks.loadtest --requests 2000 --concurrency 64
+Or against an already running server:  python -m app.benchmarks.loadtest --url http://127.0.0.1:8000
+(start that server with SGCRS_READ_CACHE_SIZE=0, or the reads are served from the response cache)
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+APP_PARENT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEXTS = [
+    "Water leakage from main pipe near the school.",
+    "Streetlight not working for the past week.",
+    "Garbage not collected regularly in our area. urgent attention needed.",
+    "Road filled with potholes causing accidents near Bus Stand.",
+]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, max(0, int(round(p / 100.0 * len(values))) - 1))
+    return values[k]
+
+
+async def _hit(client, method, path, latencies, errors, **kwargs):
+    started = time.perf_counter()
+    try:
+        res = await client.request(method, path, **kwargs)
+        ok = res.status_code < 400
+    except httpx.HTTPError:
+        ok = False
+    latencies.append((time.perf_counter() - started) * 1000.0)
+    if not ok:
+        errors[path] = errors.get(path, 0) + 1
+
+
+async def run_load(base_url, n_requests, concurrency):
+    """Half /analyze writes, half /complaints reads; returns ({route: [latency ms]}, {path: errors}, seconds)"""
+    results = {"POST /analyze": [], "GET /complaints": []}
+    errors = {}
+    sem = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+
+        async def one(i):
+            async with sem:
+                if i % 2 == 0:
+                    body = {"citizen_name": "loadtest", "text": f"{TEXTS[i % len(TEXTS)]} #{i}"}
+                    await _hit(client, "POST", "/analyze", results["POST /analyze"], errors, json=body)
+                else:
+                    await _hit(client, "GET", "/complaints", results["GET /complaints"], errors, params={"limit": 50})
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n_requests)))
+        elapsed = time.perf_counter() - started
+    return results, errors, elapsed
+
+
+def _wait_ready(base_url, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not become ready")
+
+
+def start_server(mode, port, db_path):
+    env = dict(os.environ, SGCRS_DB_MODE=mode, SGCRS_USE_TRANSFORMER=os.getenv("SGCRS_USE_TRANSFORMER", "0"))
+    env["SGCRS_DATABASE_URL"] = f"sqlite:///{db_path}"
+    env.pop("SGCRS_ASYNC_DATABASE_URL", None)
+    # every read repeats the same query: with the response cache on it would be timed, not the DB session
+    env["SGCRS_READ_CACHE_SIZE"] = "0"
+    env["PYTHONPATH"] = APP_PARENT
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=APP_PARENT, env=env)
+
+
+def report(label, results, errors, elapsed):
+    total = sum(len(v) for v in results.values())
+    print(f"\n[{label}] {total} requests in {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+    print(f"{'route':<18} {'n':>6} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for route, lat in results.items():
+        print(f"{route:<18} {len(lat):>6} {percentile(lat, 50):>8.1f} {percentile(lat, 99):>8.1f} {statistics.fmean(lat) if lat else 0:>8.1f}")
+    if errors:
+        print(f"errors: {errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--modes", default="sync,async", help="comma-separated SGCRS_DB_MODE values to compare")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", help="load an already running server instead of starting one per mode")
+    args = parser.parse_args()
+
+    if args.url:
+        results, errors, elapsed = asyncio.run(run_load(args.url, args.requests, args.concurrency))
+        report(args.url, results, errors, elapsed)
+        return
+
+    db_file = os.path.join(APP_PARENT, "sgcrs_demo.db")
+    base_url = f"http://127.0.0.1:{args.port}"
+    for mode in args.modes.split(","):
+        # each mode runs against its own scratch copy of the database so runs do not interfere
+        scratch = tempfile.mkdtemp(prefix=f"sgcrs-load-{mode}-")
+        db_path = os.path.join(scratch, "sgcrs_demo.db")
+        if os.path.exists(db_file):
+            shutil.copy(db_file, db_path)
+        server = start_server(mode, args.port, db_path)
+        try:
+            _wait_ready(base_url)
+            results, errors, elapsed = asyncio.run(run_load(base_url, args.requests, args.concurrency))
+            report(f"SGCRS_DB_MODE={mode}", results, errors, elapsed)
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# backend/app/benchmarks/suite.py
+"""Benchmark suite: text analysis, /analyze, /complaints at growing table sizes, escalator ticks.
+
+Everything runs in-process against a fresh temporary SQLite database (the transformer is
+off unless SGCRS_USE_TRANSFORMER=1), and the results are written as JSON so runs can be
+compared across commits:
+
+    python -m app.benchmarks.suite --out before.json
+    python -m app.benchmarks.suite --out after.json --compare before.json --threshold 0.15
+
+With --compare the exit status is 1 if any metric got worse than the baseline by more than
+the threshold. --sizes 1000,100000,1000000 adds the 1M-row step (about a minute of loading).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+DEFAULT_SIZES = "1000,100000"
+
+# share of texts per length class: (weight, sentences per text)
+LENGTH_MIX = [(0.6, (1, 1)), (0.3, (3, 5)), (0.1, (20, 50))]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(p / 100.0 * len(values))) - 1))
+    return values[k]
+
+
+def timed(fn, n):
+    """Latencies of n calls in ms"""
+    out = []
+    for _ in range(n):
+        started = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - started) * 1000.0)
+    return out
+
+
+class Results:
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name, value, unit, better="lower"):
+        self.metrics[name] = {"value": round(value, 4), "unit": unit, "better": better}
+        print(f"  {name:<48} {value:>12.3f} {unit}")
+
+    def latency(self, name, samples):
+        self.add(f"{name}.p50_ms", percentile(samples, 50), "ms")
+        self.add(f"{name}.p99_ms", percentile(samples, 99), "ms")
+
+
+def mixed_texts(rng, n):
+    from app.benchmarks.bench_keywords import make_text
+
+    texts = []
+    for i in range(n):
+        weights = [w for w, _ in LENGTH_MIX]
+        lo, hi = rng.choices([r for _, r in LENGTH_MIX], weights)[0]
+        # unique suffix: every text is a cache miss
+        texts.append(f"{make_text(rng, rng.randint(lo, hi))} ref {i}")
+    return texts
+
+
+def throughput(fn, n, rounds, before=None):
+    """Best-of-rounds items/s (the best round is the least disturbed by the rest of the machine)"""
+    best = 0.0
+    for _ in range(rounds):
+        if before:
+            before()
+        started = time.perf_counter()
+        fn()
+        best = max(best, n / (time.perf_counter() - started))
+    return best
+
+
+def bench_analyze_text(res, rng, n, rounds=3):
+    from app import nlp
+
+    print("analyze_text")
+    texts = mixed_texts(rng, n)
+    run_single = lambda: [nlp.analyze_text(t) for t in texts]
+    res.add("analyze_text.miss.texts_per_s", throughput(run_single, n, rounds, nlp.analysis_cache.clear), "texts/s", better="higher")
+    res.add("analyze_text.hit.texts_per_s", throughput(run_single, n, rounds), "texts/s", better="higher")
+    run_batch = lambda: nlp.analyze_texts(texts)
+    res.add("analyze_texts.batch.texts_per_s", throughput(run_batch, n, rounds, nlp.analysis_cache.clear), "texts/s", better="higher")
+
+
+def bench_api_analyze(res, client, rng, n):
+    print("POST /analyze")
+    texts = iter(mixed_texts(rng, n))
+    res.latency("api.analyze", timed(lambda: client.post("/analyze", json={"citizen_name": "bench", "text": next(texts)}), n))
+
+
+def bench_listing(res, client, label, n):
+    from app.nlp import DEPT_KEYWORDS
+
+    print(f"GET /complaints @ {label}")
+    res.latency(f"api.complaints.{label}.first_page", timed(lambda: client.get("/complaints", params={"limit": 100}), n))
+    dept = next(iter(DEPT_KEYWORDS))
+    res.latency(
+        f"api.complaints.{label}.department_page",
+        timed(lambda: client.get("/complaints", params={"limit": 100, "department": dept}), n),
+    )
+    # a cursor deep into the table (keyset pagination should not care)
+    page = client.get("/complaints", params={"limit": 1}).json()
+    deep = max(1, page[0]["id"] // 2) if page else 1
+    res.latency(
+        f"api.complaints.{label}.deep_page",
+        timed(lambda: client.get("/complaints", params={"limit": 100, "after_id": deep}), n),
+    )
+
+
+def bench_escalator(res, label):
+    from app.main import escalate_tick
+
+    print(f"escalator @ {label}")
+    started = time.perf_counter()
+    ids = escalate_tick()
+    res.add(f"escalator.{label}.tick_ms", (time.perf_counter() - started) * 1000.0, "ms")
+    res.add(f"escalator.{label}.escalated_rows", len(ids), "rows", better="none")
+    res.latency(f"escalator.{label}.idle_tick", timed(escalate_tick, 20))
+
+
+def size_label(n):
+    return f"{n // 1000000}m" if n >= 1000000 and n % 1000000 == 0 else f"{n // 1000}k" if n >= 1000 else str(n)
+
+
+def compare(current, baseline, threshold):
+    """Print a comparison table; returns the names of metrics that regressed past the threshold"""
+    regressions = []
+    print(f"\n{'metric':<48} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, m in current.items():
+        base = baseline.get(name)
+        if base is None or m["better"] == "none" or not base["value"]:
+            continue
+        change = (m["value"] - base["value"]) / base["value"]
+        worse = change > threshold if m["better"] == "lower" else change < -threshold
+        flag = "  REGRESSION" if worse else ""
+        print(f"{name:<48} {base['value']:>12.3f} {m['value']:>12.3f} {change:>+7.1%}{flag}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated table sizes for listing/escalator steps")
+    parser.add_argument("--texts", type=int, default=2000, help="texts for the analyze_text benchmark")
+    parser.add_argument("--requests", type=int, default=200, help="samples per HTTP latency benchmark")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    # the app reads its configuration at import time: point it at a scratch database first
+    scratch = tempfile.mkdtemp(prefix="sgcrs-bench-")
+    os.environ["SGCRS_DATABASE_URL"] = f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+    os.environ.pop("SGCRS_ASYNC_DATABASE_URL", None)
+    os.environ.setdefault("SGCRS_USE_TRANSFORMER", "0")
+    # the listing benchmarks repeat one query; time the SQL listing, not read_cache hits
+    os.environ["SGCRS_READ_CACHE_SIZE"] = "0"
+    try:
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+        from app.seed_data import load, synthetic_complaints
+
+        rng = random.Random(args.seed)
+        res = Results()
+        bench_analyze_text(res, rng, args.texts)
+        # no `with`: startup hooks (escalator thread, model warm-up) would disturb the timings
+        client = TestClient(app)
+        bench_api_analyze(res, client, rng, args.requests)
+
+        loaded = client.get("/stats").json()["total"]
+        for size in sorted(int(s) for s in args.sizes.split(",")):
+            if size > loaded:
+                print(f"loading {size - loaded} rows")
+                loaded += load(synthetic_complaints(size - loaded, random.Random(args.seed + size)), workers=1, verbose=False)
+            label = size_label(size)
+            bench_listing(res, client, label, args.requests)
+            bench_escalator(res, label)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": res.metrics,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nresults written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(res.metrics, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nno regressions over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# backend/app/dedup.py
+"""Near-duplicate detection for incoming complaints (MinHash + LSH over word shingles).
+
+Indexed complaints have a MinHash signature split into LSH bands; a new text is only compared
+against complaints that share at least one band bucket, and candidates are then verified with
+the exact Jaccard similarity of their shingle sets. Only a few representatives of each cluster
+are indexed (the root first, then up to CLUSTER_SAMPLE members), so a flood of reports of the
+same issue does not pile up in its buckets: a lookup costs O(bands + clusters that look alike),
+however large the clusters grow. The other open members wait in a per-cluster reserve and take
+the place of an indexed member once it is resolved.
+"""
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+import os
+import random
+import re
+import threading
+import zlib
+
+NUM_BANDS = 16
+ROWS_PER_BAND = 4
+NUM_PERM = NUM_BANDS * ROWS_PER_BAND
+# two complaints in the same department at or above this Jaccard similarity are duplicates
+SIMILARITY_THRESHOLD = float(os.getenv("SGCRS_DEDUP_THRESHOLD", "0.6"))
+# only complaints this recent are indexed when the index is rebuilt from the database
+WINDOW_DAYS = int(os.getenv("SGCRS_DEDUP_WINDOW_DAYS", "14"))
+# indexed complaints per cluster; later duplicates join the cluster in reserve
+CLUSTER_SAMPLE = int(os.getenv("SGCRS_DEDUP_CLUSTER_SAMPLE", "4"))
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(20240601)  # fixed: signatures must be comparable across restarts
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text: str) -> FrozenSet[int]:
+    """Hashed word bigrams (plus the single word for one-word texts)"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < 2:
+        grams = words
+    else:
+        grams = [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return frozenset(zlib.crc32(g.encode("utf-8")) for g in grams)
+
+
+def minhash(sh: FrozenSet[int]) -> Tuple[int, ...]:
+    if not sh:
+        return (_MAX_HASH,) * NUM_PERM
+    return tuple(min(((a * h + b) % _PRIME) & _MAX_HASH for h in sh) for a, b in _PERMS)
+
+
+def jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class Match(NamedTuple):
+    complaint_id: int
+    cluster_id: int
+    similarity: float
+
+
+class Signature(NamedTuple):
+    shingles: FrozenSet[int]
+    bands: Tuple[Tuple[int, ...], ...]
+
+
+class _Entry(NamedTuple):
+    department: str
+    cluster_id: int
+    signature: Signature
+
+
+def signature(text: str) -> Signature:
+    """Shingles plus LSH band keys; compute once per text and pass to find() and add()"""
+    sh = shingles(text)
+    sig = minhash(sh)
+    return Signature(sh, tuple(tuple(sig[i * ROWS_PER_BAND:(i + 1) * ROWS_PER_BAND]) for i in range(NUM_BANDS)))
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self._entries: Dict[int, _Entry] = {}
+        # indexed entries per cluster id
+        self._sampled: Dict[int, int] = {}
+        # open members of full clusters, oldest first; one is indexed when a sampled member is resolved
+        self._reserve: Dict[int, Dict[int, _Entry]] = {}
+        self._reserved: Dict[int, int] = {}  # reserve member -> cluster id
+        # ids removed while a rebuild is running (None otherwise), dropped from the rebuilt index
+        self._tombstones: Optional[Set[int]] = None
+        self._buckets: List[Dict[Tuple[int, ...], Set[int]]] = [dict() for _ in range(NUM_BANDS)]
+        self._lock = threading.Lock()
+
+    def find(self, sig: Signature, department: str) -> Optional[Match]:
+        """Most similar open complaint in the same department, if it passes the threshold"""
+        if not sig.shingles:
+            return None
+        best = None
+        with self._lock:
+            candidates = set()
+            for band, key in zip(self._buckets, sig.bands):
+                candidates.update(band.get(key, ()))
+            for cid in candidates:
+                entry = self._entries[cid]
+                if entry.department != department:
+                    continue
+                sim = jaccard(sig.shingles, entry.signature.shingles)
+                if sim >= self.threshold and (best is None or sim > best.similarity):
+                    best = Match(cid, entry.cluster_id, sim)
+        return best
+
+    def find_many(self, sigs: List[Signature], departments: List[str]) -> List[Tuple[Optional[int], Optional[int]]]:
+        """find() for a batch that is not stored yet, in order, also matching earlier items of the batch.
+
+        Returns (cluster_id, batch_root) per item: the stored cluster it joins, or the index of
+        the earlier batch item whose cluster it joins (that item's id is known only after the
+        insert); both None for a new cluster.
+        """
+        # batch items are indexed under negative ids: -(i + 1) is item i
+        pending = NearDuplicateIndex(self.threshold)
+        out: List[Tuple[Optional[int], Optional[int]]] = []
+        for i, (sig, department) in enumerate(zip(sigs, departments)):
+            stored = self.find(sig, department)
+            earlier = pending.find(sig, department)
+            match = earlier if earlier is not None and (stored is None or earlier.similarity > stored.similarity) else stored
+            cluster_id = match.cluster_id if match else None
+            if cluster_id is not None and cluster_id < 0:
+                out.append((None, -cluster_id - 1))
+            else:
+                out.append((cluster_id, None))
+            pending.add(-(i + 1), sig, department, cluster_id)
+        return out
+
+    def add(self, complaint_id: int, sig: Signature, department: str, cluster_id: Optional[int] = None) -> bool:
+        """Index a complaint, or keep it in reserve while its cluster already has CLUSTER_SAMPLE
+        indexed members; returns whether it was indexed"""
+        if not sig.shingles:
+            return False
+        entry = _Entry(department, cluster_id or complaint_id, sig)
+        with self._lock:
+            if self._tombstones is not None:
+                self._tombstones.discard(complaint_id)
+            freed = self._remove_locked(complaint_id)
+            indexed = self._place_locked(complaint_id, entry)
+            if freed is not None:
+                self._promote_locked(freed)
+        return indexed
+
+    def _place_locked(self, complaint_id: int, entry: _Entry) -> bool:
+        if self._sampled.get(entry.cluster_id, 0) < CLUSTER_SAMPLE:
+            self._add_locked(complaint_id, entry)
+            return True
+        self._reserve.setdefault(entry.cluster_id, {})[complaint_id] = entry
+        self._reserved[complaint_id] = entry.cluster_id
+        return False
+
+    def _add_locked(self, complaint_id: int, entry: _Entry) -> None:
+        self._entries[complaint_id] = entry
+        self._sampled[entry.cluster_id] = self._sampled.get(entry.cluster_id, 0) + 1
+        for band, key in zip(self._buckets, entry.signature.bands):
+            band.setdefault(key, set()).add(complaint_id)
+
+    def _promote_locked(self, cluster_id: int) -> None:
+        """Index the oldest reserve member of a cluster that has a free sample slot"""
+        reserve = self._reserve.get(cluster_id)
+        if not reserve or self._sampled.get(cluster_id, 0) >= CLUSTER_SAMPLE:
+            return
+        cid = next(iter(reserve))
+        entry = reserve.pop(cid)
+        del self._reserved[cid]
+        if not reserve:
+            del self._reserve[cluster_id]
+        self._add_locked(cid, entry)
+
+    def remove(self, complaint_id: int) -> None:
+        with self._lock:
+            if self._tombstones is not None:
+                self._tombstones.add(complaint_id)
+            freed = self._remove_locked(complaint_id)
+            if freed is not None:
+                self._promote_locked(freed)
+
+    def _remove_locked(self, complaint_id: int) -> Optional[int]:
+        """Drop a complaint from the index or the reserve; returns the cluster id if it freed a sample slot"""
+        entry = self._entries.pop(complaint_id, None)
+        if entry is None:
+            cluster_id = self._reserved.pop(complaint_id, None)
+            if cluster_id is not None:
+                reserve = self._reserve[cluster_id]
+                del reserve[complaint_id]
+                if not reserve:
+                    del self._reserve[cluster_id]
+            return None
+        left = self._sampled.pop(entry.cluster_id) - 1
+        if left:
+            self._sampled[entry.cluster_id] = left
+        for band, key in zip(self._buckets, entry.signature.bands):
+            ids = band.get(key)
+            if ids is not None:
+                ids.discard(complaint_id)
+                if not ids:
+                    del band[key]
+        return entry.cluster_id
+
+    def rebuild(self, rows: Iterable[Tuple[int, str, str, Optional[int]]]) -> int:
+        """Replace the index with (id, text, department, cluster_id) rows in id order (roots before
+        their duplicates); returns how many complaints were indexed"""
+        fresh = NearDuplicateIndex(self.threshold)
+        with self._lock:
+            self._tombstones = set()
+        try:
+            for cid, text, department, cluster_id in rows:
+                fresh.add(cid, signature(text or ""), department, cluster_id)
+        except BaseException:
+            with self._lock:
+                self._tombstones = None
+            raise
+        with self._lock:
+            # rows may have been read before they were resolved
+            for cid in self._tombstones:
+                freed = fresh._remove_locked(cid)
+                if freed is not None:
+                    fresh._promote_locked(freed)
+            self._tombstones = None
+            # keep complaints that were added while the rebuild was running
+            added = list(self._entries.items())
+            added.extend((cid, entry) for reserve in self._reserve.values() for cid, entry in reserve.items())
+            for cid, entry in added:
+                if cid not in fresh._entries and cid not in fresh._reserved:
+                    fresh._place_locked(cid, entry)
+            self._entries, self._sampled, self._buckets = fresh._entries, fresh._sampled, fresh._buckets
+            self._reserve, self._reserved = fresh._reserve, fresh._reserved
+            return len(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
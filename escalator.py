@@ -0,0 +1,171 @@
+# backend/app/escalator.py
+"""SLA escalator: marks in-progress complaints older than ESCALATION_SECONDS as escalated.
+
+Every API worker runs the loop, but a pass only happens while the process holds the
+"escalator" lease (a row in the leases table), so one process escalates no matter how many
+workers run. The holder renews the lease every CHECK_INTERVAL; if it dies, the lease expires
+after LEASE_SECONDS and the next worker to try takes over.
+
+Run it outside the API instead (and set SGCRS_ESCALATOR=off for the API workers):
+
+    python -m app.escalator
+"""
+from typing import Callable, List, Optional
+import datetime
+import os
+import signal
+import socket
+import threading
+import uuid
+
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+
+from app.db import SessionLocal, engine, init_db
+from app.metrics import ESCALATED, ESCALATOR_TICK_SECONDS
+from app.models import Complaint, LeaseModel
+
+ESCALATION_SECONDS = 60 * 60 * 24 * 2  # 48 hours -> for demo you can set to 120 for 2 minutes
+CHECK_INTERVAL = 30  # seconds
+# a holder that misses this many seconds of renewals loses the lease
+LEASE_SECONDS = int(os.getenv("SGCRS_ESCALATOR_LEASE_SECONDS", str(3 * CHECK_INTERVAL)))
+# "lease": API workers compete for the lease; "off": the API never escalates (standalone runner)
+ESCALATOR_MODE = os.getenv("SGCRS_ESCALATOR", "lease")
+
+LEASE_NAME = "escalator"
+
+# dialects with INSERT ... ON CONFLICT DO UPDATE; others take the lease with UPDATE, then INSERT
+_UPSERT_INSERTS = {"sqlite": sqlite_insert, "postgresql": pg_insert}
+
+
+class Lease:
+    """A named lease in the leases table; acquire() both takes and renews it"""
+
+    def __init__(self, name: str, ttl: float = LEASE_SECONDS, holder: Optional[str] = None):
+        self.name = name
+        self.ttl = ttl
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.held = False
+
+    def acquire(self) -> bool:
+        """Take the lease if it is free or expired, or extend it if we hold it (one upsert)"""
+        now = datetime.datetime.utcnow()
+        expires = now + datetime.timedelta(seconds=self.ttl)
+        claimable = or_(LeaseModel.holder == self.holder, LeaseModel.expires_at < now)
+        upsert_insert = _UPSERT_INSERTS.get(engine.dialect.name)
+        db = SessionLocal()
+        try:
+            if upsert_insert is not None:
+                stmt = upsert_insert(LeaseModel).values(name=self.name, holder=self.holder, expires_at=expires)
+                db.execute(stmt.on_conflict_do_update(
+                    index_elements=[LeaseModel.name],
+                    set_={"holder": self.holder, "expires_at": expires},
+                    where=claimable,
+                ))
+                db.commit()
+            else:
+                self._claim_portable(db, claimable, expires)
+            holder = db.execute(select(LeaseModel.holder).where(LeaseModel.name == self.name)).scalar()
+        finally:
+            db.close()
+        was_held, self.held = self.held, holder == self.holder
+        if self.held != was_held:
+            print(f"[{self.name.capitalize()}] {'acquired' if self.held else 'lost'} lease {self.name!r} ({self.holder})")
+        return self.held
+
+    def _claim_portable(self, db, claimable, expires: datetime.datetime) -> None:
+        """UPDATE the row if it is ours or expired; if there is no row yet, INSERT it (losing a race is fine)"""
+        res = db.execute(
+            update(LeaseModel)
+            .where(LeaseModel.name == self.name, claimable)
+            .values(holder=self.holder, expires_at=expires)
+        )
+        db.commit()
+        if res.rowcount:
+            return
+        try:
+            db.execute(insert(LeaseModel).values(name=self.name, holder=self.holder, expires_at=expires))
+            db.commit()
+        except IntegrityError:
+            # the row exists (held by someone else) or another process inserted it first
+            db.rollback()
+
+    def release(self) -> None:
+        """Give the lease up now so another process can take over without waiting for expiry"""
+        if not self.held:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(delete(LeaseModel).where(LeaseModel.name == self.name, LeaseModel.holder == self.holder))
+            db.commit()
+        finally:
+            db.close()
+        self.held = False
+
+
+def escalate_tick() -> List[int]:
+    """Escalate all overdue in-progress complaints with one indexed UPDATE; returns their ids"""
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=ESCALATION_SECONDS)
+    db = SessionLocal()
+    try:
+        with ESCALATOR_TICK_SECONDS.time():
+            ids = Complaint.escalate_overdue(db, cutoff)
+    finally:
+        db.close()
+    if ids:
+        ESCALATED.inc(amount=len(ids))
+        print(f"[Escalator] {len(ids)} complaint(s) escalated: {ids[:20]}{' ...' if len(ids) > 20 else ''}")
+    return ids
+
+
+lease = Lease(LEASE_NAME)
+_stop = threading.Event()
+
+
+def escalator_loop(tick: Callable[[], List[int]] = escalate_tick) -> None:
+    """Run tick every CHECK_INTERVAL while holding the lease, until stop() is called"""
+    while not _stop.is_set():
+        try:
+            if lease.acquire():
+                tick()
+        except Exception as e:
+            print("Escalator error:", e)
+        _stop.wait(CHECK_INTERVAL)
+
+
+def start(tick: Callable[[], List[int]] = escalate_tick) -> Optional[threading.Thread]:
+    """Start the loop in a daemon thread unless SGCRS_ESCALATOR=off"""
+    if ESCALATOR_MODE == "off":
+        print("Escalator disabled in this process (SGCRS_ESCALATOR=off).")
+        return None
+    _stop.clear()
+    t = threading.Thread(target=escalator_loop, args=(tick,), name="escalator", daemon=True)
+    t.start()
+    print("Escalator thread started.")
+    return t
+
+
+def stop() -> None:
+    _stop.set()
+    try:
+        lease.release()
+    except Exception as e:
+        print("Escalator error:", e)
+
+
+def main() -> None:
+    init_db()
+    signal.signal(signal.SIGTERM, lambda *_: _stop.set())
+    print(f"Escalator running as {lease.holder} (every {CHECK_INTERVAL}s, lease {LEASE_SECONDS}s).")
+    try:
+        escalator_loop()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# backend/app/events.py
+"""In-process change feed: created / status_changed / escalated events with a sequence number.
+
+Writers (request handlers, the escalator thread) publish after their transaction commits;
+readers ask for everything after the last seq they saw. A bounded replay buffer covers short
+disconnects; a client that fell further behind gets ``reset`` and refetches.
+
+seq is per process and starts at 0, so every feed also has a random ``epoch``. Clients send
+back the epoch with their seq; a different epoch (a restart, or another uvicorn worker) means
+the seq is meaningless here and also yields ``reset``.
+Idle subscribers park on an asyncio.Event, so they cost nothing until something changes.
+"""
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import os
+import threading
+import time
+import uuid
+
+# events kept for replay (?since= / Last-Event-ID)
+REPLAY_BUFFER = int(os.getenv("SGCRS_EVENT_BUFFER", "1000"))
+
+
+class ChangeFeed:
+    def __init__(self, maxlen: int = REPLAY_BUFFER):
+        self.seq = 0
+        self.epoch = uuid.uuid4().hex[:12]
+        self._events: "deque[Dict[str, Any]]" = deque(maxlen=maxlen)
+        self._waiters: Dict[asyncio.Event, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, type: str, ids: List[int], **data: Any) -> Dict[str, Any]:
+        """Append an event and wake every waiting subscriber; safe to call from any thread"""
+        with self._lock:
+            self.seq += 1
+            event = dict(seq=self.seq, type=type, ids=list(ids), ts=time.time(), **data)
+            self._events.append(event)
+            waiters = list(self._waiters.items())
+        for waiter, loop in waiters:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                pass  # loop already closed
+        return event
+
+    def since(self, seq: int, epoch: Optional[str] = None) -> Tuple[List[Dict[str, Any]], bool, int]:
+        """(events after seq, whether the caller missed events the buffer no longer holds, latest seq)
+
+        A seq taken from another epoch always counts as missed events.
+        """
+        with self._lock:
+            if (epoch is not None and epoch != self.epoch) or seq > self.seq:
+                return [], True, self.seq
+            if seq == self.seq:
+                return [], False, self.seq
+            oldest = self._events[0]["seq"] if self._events else self.seq + 1
+            if seq < oldest - 1:
+                return [], True, self.seq
+            return [e for e in self._events if e["seq"] > seq], False, self.seq
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """Wait until there is an event after seq (True) or timeout passes (False)"""
+        waiter = asyncio.Event()
+        with self._lock:
+            if self.seq != seq:
+                return True
+            self._waiters[waiter] = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(waiter.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.pop(waiter, None)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._waiters)
+
+
+feed = ChangeFeed()
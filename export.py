@@ -0,0 +1,58 @@
+# backend/app/export.py
+from typing import Iterable, Iterator, List
+import csv
+import datetime
+import enum
+import io
+import json
+
+from app.db import SessionLocal
+from app.models import Complaint, EXPORT_COLUMNS
+
+# rows encoded per chunk handed to the HTTP response
+EXPORT_CHUNK_ROWS = 1000
+
+
+def _plain(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def ndjson_chunks(rows: Iterable[tuple], columns: List[str] = EXPORT_COLUMNS) -> Iterator[str]:
+    buf = []
+    for row in rows:
+        buf.append(json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False))
+        if len(buf) >= EXPORT_CHUNK_ROWS:
+            yield "\n".join(buf) + "\n"
+            buf = []
+    if buf:
+        yield "\n".join(buf) + "\n"
+
+
+def csv_chunks(rows: Iterable[tuple], columns: List[str] = EXPORT_COLUMNS) -> Iterator[str]:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    n = 0
+    for row in rows:
+        writer.writerow([_plain(v) for v in row])
+        n += 1
+        if n >= EXPORT_CHUNK_ROWS:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+            n = 0
+    if out.tell():
+        yield out.getvalue()
+
+
+def stream_export(encoder, **filters) -> Iterator[str]:
+    """Encode matching complaints chunk by chunk; the session stays open only while streaming"""
+    db = SessionLocal()
+    try:
+        yield from encoder(Complaint.iter_export_rows(db, batch_size=EXPORT_CHUNK_ROWS, **filters))
+    finally:
+        db.close()
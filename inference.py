@@ -0,0 +1,107 @@
+# backend/app/inference.py
+"""Request-coalescing queue for transformer scoring.
+
+Concurrent callers submit single texts; a worker thread waits up to ``max_wait_ms`` (or until
+``max_batch`` items are queued) and runs them through the model as one batched call.
+"""
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+import queue
+import threading
+import time
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+QUEUE_DEPTH_BUCKETS = [0, 1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+class Histogram:
+    """Cumulative bucket counts, Prometheus style (le=bound)"""
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = list(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "buckets": {str(b): c for b, c in zip(self.buckets, self.counts)},
+                "count": self.count,
+                "sum": self.sum,
+            }
+
+
+class MicroBatcher:
+    def __init__(self, fn: Callable[[List[str]], List], max_batch: int = 32, max_wait_ms: float = 5.0):
+        self.fn = fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_depths = Histogram(QUEUE_DEPTH_BUCKETS)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                    self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        self._ensure_worker()
+        fut: Future = Future()
+        self.queue_depths.observe(self._queue.qsize())
+        self._queue.put((text, fut))
+        return fut
+
+    def __call__(self, text: str, timeout: Optional[float] = None):
+        """Blocking helper: score one text as part of whatever batch it lands in"""
+        return self.submit(text).result(timeout=timeout)
+
+    def _collect(self) -> List:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            self.batch_sizes.observe(len(batch))
+            try:
+                results = self.fn([text for text, _ in batch])
+                for (_, fut), result in zip(batch, results):
+                    fut.set_result(result)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    def stats(self) -> Dict:
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue.qsize(),
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_depth_at_submit": self.queue_depths.snapshot(),
+        }
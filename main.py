@@ -1,110 +1,586 @@
 # backend/app/main.py
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
 from typing import Optional, List
-from app.db import init_db, SessionLocal
-from app.models import Complaint, ComplaintCreate, ComplaintRead, ComplaintStatusEnum
-from app.nlp import analyze_text
-from app.routing import ROUTING_TABLE, route_to_department
+from app.db import init_db, run_db, async_engine, SessionLocal
+from app.cache import LRUCache
+from app.dedup import NearDuplicateIndex, WINDOW_DAYS, signature
+from app.events import feed
+from app import escalator
+from app.escalator import ESCALATION_SECONDS
+from app.export import csv_chunks, ndjson_chunks, stream_export
+from app import metrics
+from app import notifier
+from app.metrics import COMPLAINTS_CREATED, RequestTimer
+from app.models import Complaint, ComplaintCluster, ComplaintCreate, ComplaintRead, ComplaintStats, ComplaintStatusEnum
+from app.nlp import analyze_text, analyze_texts, analysis_cache, model_manager, transformer_batcher
+from app import routing
+from app.search import SearchUnavailable, search_complaints
+from app.snapshot import FORMATS, SnapshotUnavailable, check_available, parse_columns, snapshot_chunks
 import threading
-import time
 import datetime
+import hashlib
+import json
+import os
 
 app = FastAPI(title="SGCRS Prototype API")
+app.add_middleware(RequestTimer)
 
 # initialize DB (creates sqlite file)
 init_db()
 
 from app.models import ComplaintModel
-from app.seed_data import fake, analyze_text, route_to_department
-from sqlalchemy.orm import Session
+from app.seed_data import seed
 db = SessionLocal()
 count = db.query(ComplaintModel).count()
-if count == 0:
-    import app.seed_data  # auto-run seeder
 db.close()
+if count == 0:
+    seed(100)  # auto-run seeder on an empty database
+
+
+# /complaints page size
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# /stats results are cached briefly and dropped whenever this process writes complaints
+STATS_CACHE_SECONDS = 10
+stats_cache = LRUCache(maxsize=256, ttl=STATS_CACHE_SECONDS)
 
+# near-duplicate index over open complaints (rebuilt from the DB at startup, updated on ingest)
+dup_index = NearDuplicateIndex()
 
-# background escalator
-ESCALATION_SECONDS = 60 * 60 * 24 * 2  # 48 hours -> for demo you can set to 120 for 2 minutes
-CHECK_INTERVAL = 30  # seconds
+# longest a GET /events long-poll is held open, and the SSE keep-alive interval
+EVENTS_MAX_WAIT = 30
+SSE_KEEPALIVE_SECONDS = 15
+
+# Idempotency-Key / message_id -> complaint id, so gateway retries skip the DB lookup too
+# (the unique idempotency_key column is the source of truth; this only remembers recent keys)
+IDEMPOTENCY_KEY_MAX = 128  # idempotency_key column size
+# stored keys are prefixed with their source ("hdr:" / "msg:") so that an Idempotency-Key header
+# and a gateway message_id with the same value never resolve to each other's complaint
+CLIENT_KEY_MAX = IDEMPOTENCY_KEY_MAX - 4
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("SGCRS_IDEMPOTENCY_CACHE_SIZE", "100000"))
+IDEMPOTENCY_CACHE_TTL = float(os.getenv("SGCRS_IDEMPOTENCY_CACHE_TTL", str(24 * 3600)))
+idempotency_index = LRUCache(maxsize=IDEMPOTENCY_CACHE_SIZE, ttl=IDEMPOTENCY_CACHE_TTL)
+
+# encoded GET /complaints pages and GET /complaints/{id} bodies, keyed by the table version
+# (the change-feed seq, bumped by every create / status change / escalation in this process).
+# That version is only meaningful per process and per epoch: it restarts at 0 and differs
+# between workers, so responses send it as X-Table-Version together with X-Table-Epoch and
+# clients compare versions only while the epoch stays the same (ETags stay valid across both).
+# The TTL bounds staleness from writers this process does not see (other workers, the
+# standalone escalator).
+READ_CACHE_SIZE = int(os.getenv("SGCRS_READ_CACHE_SIZE", "1024"))
+READ_CACHE_SECONDS = float(os.getenv("SGCRS_READ_CACHE_SECONDS", "10"))
+read_cache = LRUCache(maxsize=READ_CACHE_SIZE, ttl=READ_CACHE_SECONDS)
+
+# upper bound on items per /analyze/batch call (call-center exports are split client-side)
+MAX_BATCH_ITEMS = 10000
 
 class AnalyzeRequest(BaseModel):
     citizen_name: Optional[str] = "Anonymous"
     text: str
+    # gateway message id; same effect as an Idempotency-Key header
+    message_id: Optional[str] = Field(None, max_length=CLIENT_KEY_MAX)
+
+class AnalyzeBatchRequest(BaseModel):
+    items: List[AnalyzeRequest]
+
+class AnalyzeBatchResponse(BaseModel):
+    count: int
+    ids: List[int]
+    # items whose key was already stored (returned, not re-inserted)
+    replayed: int = 0
+
+@app.get("/health")
+def health():
+    """Liveness plus transformer readiness; /analyze serves rule-based results until the model is ready"""
+    return {"status": "ok", "transformer": model_manager.status()}
+
+@app.get("/inference/stats")
+def inference_stats():
+    """Micro-batching queue depth and batch-size histograms, plus analysis cache hit/miss counters"""
+    return dict(transformer_batcher.stats(), analysis_cache=analysis_cache.stats())
+
+# scrape-time gauges for state owned by other modules
+metrics.Gauge("sgcrs_analysis_cache_entries", "Cached text analyses", lambda: len(analysis_cache))
+metrics.Gauge("sgcrs_analysis_cache_hits_total", "Analysis cache hits", lambda: analysis_cache.hits, kind="counter")
+metrics.Gauge("sgcrs_analysis_cache_misses_total", "Analysis cache misses", lambda: analysis_cache.misses, kind="counter")
+metrics.Gauge("sgcrs_inference_queue_depth", "Texts waiting for the transformer batcher", lambda: transformer_batcher.stats()["queue_depth"])
+metrics.Gauge("sgcrs_dedup_index_entries", "Open complaints indexed for near-duplicate lookup (cluster samples)", lambda: len(dup_index))
+metrics.Gauge("sgcrs_change_feed_seq", "Last change-feed sequence number", lambda: feed.seq)
+metrics.Gauge("sgcrs_read_cache_entries", "Cached complaint read responses", lambda: len(read_cache))
+metrics.Gauge("sgcrs_read_cache_hits_total", "Complaint read cache hits", lambda: read_cache.hits, kind="counter")
+metrics.Gauge("sgcrs_read_cache_misses_total", "Complaint read cache misses", lambda: read_cache.misses, kind="counter")
+metrics.Gauge("sgcrs_change_feed_subscribers", "Clients waiting on the change feed", lambda: feed.subscribers)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text exposition of this worker's counters and histograms"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def _idempotency_key(header: Optional[str], message_id: Optional[str]) -> Optional[str]:
+    """Stored key for a request: the Idempotency-Key header wins over the message_id"""
+    if header:
+        return f"hdr:{header}"
+    if message_id:
+        return f"msg:{message_id}"
+    return None
+
+async def _stored_ids(keys: List[str]) -> dict:
+    """{idempotency key: complaint id} for keys already stored (recent ones from memory)"""
+    found, missing = {}, []
+    for k in dict.fromkeys(keys):
+        cid = idempotency_index.get(k)
+        if cid is None:
+            missing.append(k)
+        else:
+            found[k] = cid
+    if missing:
+        stored = await run_db(Complaint.ids_for_idempotency_keys, missing)
+        for k, cid in stored.items():
+            idempotency_index.set(k, cid)
+        found.update(stored)
+    return found
 
 @app.post("/analyze", response_model=ComplaintRead)
-def analyze_and_create(req: AnalyzeRequest):
-    """Analyze text, classify department & urgency, route and store complaint"""
-    analysis = analyze_text(req.text)
+async def analyze_and_create(
+    req: AnalyzeRequest, response: Response, idempotency_key: Optional[str] = Header(None, max_length=CLIENT_KEY_MAX)
+):
+    """Analyze text, classify department & urgency, route and store complaint.
+
+    With an Idempotency-Key header (or message_id) a retry returns the complaint stored by
+    the first attempt, without classifying or writing again (Idempotent-Replayed: true).
+    """
+    key = _idempotency_key(idempotency_key, req.message_id)
+    if key:
+        cid = (await _stored_ids([key])).get(key)
+        original = await run_db(Complaint.get, cid) if cid is not None else None
+        if original is not None:
+            response.headers["Idempotent-Replayed"] = "true"
+            return original
+
+    # classification is CPU-bound (and may wait on the transformer batcher): keep it off the event loop
+    analysis = await run_in_threadpool(analyze_text, req.text)
     department = analysis["department"]
     urgency = analysis["urgency"]
     reason = analysis.get("reason", "")
 
-    routed_to = route_to_department(department)
+    unit = routing.route(department, req.text)
+
+    # link to an open cluster if this is a near-duplicate of a recent complaint (two near-duplicates
+    # arriving at the same moment may both miss each other and start separate clusters)
+    sig = await run_in_threadpool(signature, req.text)
+    match = await run_in_threadpool(dup_index.find, sig, department)
 
     # store complaint in DB
-    db = SessionLocal()
     complaint = ComplaintCreate(
         citizen_name=req.citizen_name,
         text=req.text,
         department=department,
         urgency=urgency,
-        routed_to=routed_to,
-        reason=reason
+        dept_id=unit.id,
+        reason=reason,
+        cluster_id=match.cluster_id if match else None,
+        idempotency_key=key
     )
-    c = Complaint.create(db, complaint)
-    db.close()
+    c, created = await run_db(Complaint.create_idempotent, complaint)
+    if key:
+        idempotency_index.set(key, c.id)
+    if not created:
+        # a concurrent retry with the same key won the insert
+        response.headers["Idempotent-Replayed"] = "true"
+        return c
+    dup_index.add(c.id, sig, department, c.cluster_id)
+    COMPLAINTS_CREATED.inc(department, urgency)
+    stats_cache.clear()
+    feed.publish("created", [c.id], complaint=jsonable_encoder(c))
     return c
 
+async def _store_batch(items: List[AnalyzeRequest], keys: List[Optional[str]]) -> List[int]:
+    analyses = await run_in_threadpool(analyze_texts, [item.text for item in items])
+    rules = routing.engine.rules  # one rules version for the whole batch
+    sigs = await run_in_threadpool(lambda: [signature(item.text) for item in items])
+    # near-duplicates of stored complaints, and of earlier items in this batch
+    matches = await run_in_threadpool(dup_index.find_many, sigs, [a["department"] for a in analyses])
+
+    complaints = [
+        ComplaintCreate(
+            citizen_name=item.citizen_name,
+            text=item.text,
+            department=a["department"],
+            urgency=a["urgency"],
+            dept_id=rules.route(a["department"], item.text).id,
+            reason=a.get("reason", ""),
+            cluster_id=cluster_id,
+            idempotency_key=k
+        )
+        for item, a, (cluster_id, _), k in zip(items, analyses, matches, keys)
+    ]
+    roots = [root for _, root in matches]
+
+    ids = await run_db(Complaint.create_many, complaints, roots)
+    for cid, sig, c, root in zip(ids, sigs, complaints, roots):
+        cluster_id = (complaints[root].cluster_id or ids[root]) if root is not None else c.cluster_id
+        dup_index.add(cid, sig, c.department, cluster_id)
+        COMPLAINTS_CREATED.inc(c.department, c.urgency)
+        if c.idempotency_key:
+            idempotency_index.set(c.idempotency_key, cid)
+    stats_cache.clear()
+    # ids only: subscribers that need the rows refetch once instead of receiving 10k in one event
+    feed.publish("created", ids)
+    return ids
+
+@app.post("/analyze/batch", response_model=AnalyzeBatchResponse)
+async def analyze_and_create_batch(
+    req: AnalyzeBatchRequest, idempotency_key: Optional[str] = Header(None, max_length=CLIENT_KEY_MAX - 8)
+):
+    """Analyze many texts in one pass and store them all in a single transaction.
+
+    Items are keyed by their message_id, or "<Idempotency-Key>:<index>" when the batch has an
+    Idempotency-Key header; items whose key is already stored are neither analyzed nor written.
+    """
+    if len(req.items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_ITEMS} items per batch")
+
+    keys = [
+        _idempotency_key(None, item.message_id) or _idempotency_key(f"{idempotency_key}:{i}" if idempotency_key else None, None)
+        for i, item in enumerate(req.items)
+    ]
+    for attempt in range(2):
+        known = await _stored_ids([k for k in keys if k])
+        # unkeyed items and the first occurrence of each unseen key are new
+        fresh, seen = [], set()
+        for i, k in enumerate(keys):
+            if k is None or (k not in known and k not in seen):
+                fresh.append(i)
+                seen.add(k)
+        try:
+            new_ids = await _store_batch([req.items[i] for i in fresh], [keys[i] for i in fresh]) if fresh else []
+            break
+        except IntegrityError:
+            # a concurrent request stored some of these keys first: look them up again and retry once
+            if attempt:
+                raise
+
+    by_index = dict(zip(fresh, new_ids))
+    by_key = dict(known, **{keys[i]: cid for i, cid in by_index.items() if keys[i]})
+    ids = [by_index[i] if i in by_index else by_key[k] for i, k in enumerate(keys)]
+    return AnalyzeBatchResponse(count=len(ids), ids=ids, replayed=len(ids) - len(fresh))
+
+@app.get("/departments", response_model=List[str])
+def list_departments():
+    return routing.engine.rules.department_names()
+
+@app.get("/routing")
+def routing_rules():
+    """Active routing rules: version, source and every routing unit"""
+    rules = routing.engine.rules
+    return {
+        "version": rules.version,
+        "source": rules.source,
+        "default_department": rules.default.name,
+        "units": [dict(u._asdict(), routed_to=u.routed_to) for u in rules.units.values()],
+    }
+
+@app.post("/routing/reload")
+def reload_routing():
+    """Re-read SGCRS_ROUTING_FILE now instead of waiting for the watcher"""
+    if not routing.engine.path:
+        raise HTTPException(status_code=400, detail="No routing file configured (SGCRS_ROUTING_FILE)")
+    try:
+        rules = routing.engine.load()
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Routing rules not loaded: {e}")
+    return {"version": rules.version, "units": len(rules.units)}
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+async def _cached_read(request: Request, key: tuple, load) -> Response:
+    """Serve a complaint read from read_cache, or run load() and cache the encoded JSON.
+
+    load() returns (payload, extra headers). The ETag is a hash of the body, so a client that
+    sends it back in If-None-Match gets a 304 without the database being touched.
+    """
+    version = feed.seq
+    # routed_to is derived from the routing rules, so a rules reload is a new version too
+    key = key + (version, routing.engine.rules.version)
+    entry = read_cache.get(key)
+    if entry is None:
+        payload, headers = await load()
+        body = json.dumps(
+            jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+        headers["ETag"] = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        entry = (body, headers)
+        read_cache.set(key, entry)
+    body, headers = entry
+    headers = dict(
+        headers, **{"X-Table-Version": str(version), "X-Table-Epoch": feed.epoch, "Cache-Control": "no-cache"}
+    )
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
 @app.get("/complaints", response_model=List[ComplaintRead])
-def list_complaints():
-    db = SessionLocal()
-    items = Complaint.list_all(db)
-    db.close()
-    return items
+async def list_complaints(
+    request: Request,
+    after_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    department: Optional[str] = None,
+    status: Optional[ComplaintStatusEnum] = None,
+    urgency: Optional[str] = None,
+    created_from: Optional[datetime.datetime] = None,
+    created_to: Optional[datetime.datetime] = None,
+):
+    """Newest-first keyset page; X-Next-After-Id carries the cursor for the next page.
+
+    Pages are cached per table version and carry an ETag (If-None-Match -> 304).
+    """
+    async def load():
+        items = await run_db(
+            Complaint.list_page, after_id=after_id, limit=limit, department=department, status=status,
+            urgency=urgency, created_from=created_from, created_to=created_to
+        )
+        headers = {"X-Next-After-Id": str(items[-1].id)} if len(items) == limit else {}
+        return items, headers
+
+    key = ("list", after_id, limit, department, status, urgency, created_from, created_to)
+    return await _cached_read(request, key, load)
+
+@app.get("/complaints/search", response_model=List[ComplaintRead])
+async def search_complaints_endpoint(
+    q: str = Query(..., min_length=1),
+    department: Optional[str] = None,
+    status: Optional[ComplaintStatusEnum] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    sort: str = Query("rank", regex="^(rank|recent)$"),
+):
+    """Full-text search over complaint text and citizen name, best match (or newest) first"""
+    try:
+        return await run_db(
+            search_complaints, q, department=department, status=status, limit=limit, offset=offset, sort=sort
+        )
+    except SearchUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+def _export_response(encoder, media_type: str, filename: str, filters: dict) -> StreamingResponse:
+    return StreamingResponse(
+        stream_export(encoder, **filters),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.get("/complaints/export.ndjson")
+def export_complaints_ndjson(
+    department: Optional[str] = None,
+    status: Optional[ComplaintStatusEnum] = None,
+    urgency: Optional[str] = None,
+    created_from: Optional[datetime.datetime] = None,
+    created_to: Optional[datetime.datetime] = None,
+):
+    """Stream every matching complaint as newline-delimited JSON (constant memory)"""
+    filters = dict(department=department, status=status, urgency=urgency, created_from=created_from, created_to=created_to)
+    return _export_response(ndjson_chunks, "application/x-ndjson", "complaints.ndjson", filters)
+
+@app.get("/complaints/export.csv")
+def export_complaints_csv(
+    department: Optional[str] = None,
+    status: Optional[ComplaintStatusEnum] = None,
+    urgency: Optional[str] = None,
+    created_from: Optional[datetime.datetime] = None,
+    created_to: Optional[datetime.datetime] = None,
+):
+    """Stream every matching complaint as CSV (constant memory)"""
+    filters = dict(department=department, status=status, urgency=urgency, created_from=created_from, created_to=created_to)
+    return _export_response(csv_chunks, "text/csv", "complaints.csv", filters)
+
+@app.get("/complaints/snapshot")
+def complaints_snapshot(
+    format: str = Query("arrow", regex="^(arrow|parquet)$"),
+    columns: Optional[str] = Query(None, description="comma-separated subset of the export columns"),
+    limit: Optional[int] = Query(None, ge=1),
+    department: Optional[str] = None,
+    status: Optional[ComplaintStatusEnum] = None,
+    urgency: Optional[str] = None,
+    created_from: Optional[datetime.datetime] = None,
+    created_to: Optional[datetime.datetime] = None,
+):
+    """Matching complaints, newest first, as an Arrow IPC stream or Parquet file with dictionary-encoded
+    department/urgency/status columns"""
+    try:
+        check_available(format)
+        cols = parse_columns(columns)
+    except SnapshotUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filters = dict(department=department, status=status, urgency=urgency, created_from=created_from, created_to=created_to)
+    return StreamingResponse(
+        snapshot_chunks(format, cols, limit=limit, **filters),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="complaints.{format}"'},
+    )
+
+@app.get("/stats", response_model=ComplaintStats)
+async def complaint_stats(
+    department: Optional[str] = None,
+    status: Optional[ComplaintStatusEnum] = None,
+    sla_hours: float = Query(ESCALATION_SECONDS / 3600, gt=0),
+):
+    """KPIs, per-department/status/urgency counts and SLA breaches, computed in SQL"""
+    key = (department, status, sla_hours)
+    stats = stats_cache.get(key)
+    if stats is None:
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(hours=sla_hours)
+        stats = await run_db(Complaint.stats, cutoff, department=department, status=status)
+        stats_cache.set(key, stats)
+    return stats
+
+@app.get("/clusters", response_model=List[ComplaintCluster])
+async def list_clusters(department: Optional[str] = None, limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE)):
+    """Near-duplicate clusters, largest first"""
+    return await run_db(Complaint.list_clusters, department=department, limit=limit)
+
+@app.get("/clusters/{cluster_id}", response_model=List[ComplaintRead])
+async def get_cluster(cluster_id: int):
+    """The first complaint of a cluster followed by its duplicates"""
+    members = await run_db(Complaint.cluster_members, cluster_id)
+    if not members:
+        raise HTTPException(status_code=404, detail="Cluster not found")
+    return members
+
+@app.get("/events")
+async def poll_events(
+    since: Optional[int] = Query(None, ge=0),
+    epoch: Optional[str] = None,
+    timeout: float = Query(0, ge=0, le=EVENTS_MAX_WAIT),
+):
+    """Change feed as a long-poll: events after `since`, waiting up to `timeout` seconds for one.
+
+    Without `since` only the current seq and epoch are returned (take them before a full fetch);
+    send both back on the next call. `reset` means events were missed (buffer overrun, or an
+    epoch from a restarted or different worker) and the client should refetch.
+    """
+    if since is None:
+        return {"seq": feed.seq, "epoch": feed.epoch, "reset": False, "events": []}
+    events, reset, seq = feed.since(since, epoch)
+    if not events and not reset and timeout:
+        await feed.wait(since, timeout)
+        events, reset, seq = feed.since(since, epoch)
+    return {"seq": seq, "epoch": feed.epoch, "reset": reset, "events": events}
+
+def _sse(event: str, seq: int, data) -> str:
+    # the id carries the epoch so a reconnect to a restarted (or another) worker is detected
+    return f"id: {feed.epoch}:{seq}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/events/stream")
+async def stream_events(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0),
+    epoch: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    """Change feed as Server-Sent Events; reconnecting EventSource clients resume from Last-Event-ID
+    ("<epoch>:<seq>"), and get a `reset` event first if the epoch is not this worker's"""
+    if since is None and last_event_id:
+        last_epoch, _, last_seq = last_event_id.rpartition(":")
+        if last_seq.isdigit():
+            since, epoch = int(last_seq), last_epoch or None
+
+    async def events():
+        seq = feed.seq if since is None else since
+        seq_epoch = epoch
+        while not await request.is_disconnected():
+            batch, reset, latest = feed.since(seq, seq_epoch)
+            if reset:
+                yield _sse("reset", latest, {"seq": latest, "epoch": feed.epoch})
+            for e in batch:
+                yield _sse(e["type"], e["seq"], e)
+            seq, seq_epoch = latest, feed.epoch
+            if not await feed.wait(seq, SSE_KEEPALIVE_SECONDS):
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @app.get("/complaints/{complaint_id}", response_model=ComplaintRead)
-def get_complaint(complaint_id: int):
-    db = SessionLocal()
-    c = Complaint.get(db, complaint_id)
-    db.close()
-    if not c:
-        raise HTTPException(status_code=404, detail="Complaint not found")
-    return c
+async def get_complaint(request: Request, complaint_id: int):
+    async def load():
+        c = await run_db(Complaint.get, complaint_id)
+        if not c:
+            raise HTTPException(status_code=404, detail="Complaint not found")
+        return c, {}
+
+    return await _cached_read(request, ("get", complaint_id), load)
 
 @app.post("/complaints/{complaint_id}/update_status", response_model=ComplaintRead)
-def update_status(complaint_id: int, status: ComplaintStatusEnum):
-    db = SessionLocal()
-    c = Complaint.get(db, complaint_id)
-    if not c:
-        db.close()
+async def update_status(complaint_id: int, status: ComplaintStatusEnum):
+    updated = await run_db(Complaint.update_status, complaint_id, status)
+    if not updated:
         raise HTTPException(status_code=404, detail="Complaint not found")
-    updated = Complaint.update_status(db, complaint_id, status)
-    db.close()
+    if status == ComplaintStatusEnum.resolved:
+        dup_index.remove(complaint_id)
+    stats_cache.clear()
+    feed.publish("status_changed", [complaint_id], status=status.value, complaint=jsonable_encoder(updated))
     return updated
 
-# background escalator thread implementation
-def escalator_loop():
-    while True:
-        db = SessionLocal()
-        try:
-            now = datetime.datetime.utcnow()
-            all_open = Complaint.list_open(db)
-            for c in all_open:
-                created = c.created_at
-                delta = now - created
-                if delta.total_seconds() > ESCALATION_SECONDS and c.status == ComplaintStatusEnum.in_progress:
-                    Complaint.update_status(db, c.id, ComplaintStatusEnum.escalated)
-                    print(f"[Escalator] Complaint {c.id} escalated (delta {delta})")
-        except Exception as e:
-            print("Escalator error:", e)
-        finally:
-            db.close()
-        time.sleep(CHECK_INTERVAL)
+# background escalator (app.escalator; runs only while this process holds the escalator lease)
+def escalate_tick() -> List[int]:
+    """One escalator pass, plus the cache/feed updates this process owns"""
+    ids = escalator.escalate_tick()
+    if ids:
+        stats_cache.clear()
+        feed.publish("escalated", ids, status=ComplaintStatusEnum.escalated.value)
+    return ids
+
+def rebuild_dup_index():
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=WINDOW_DAYS)
+    db = SessionLocal()
+    try:
+        n = dup_index.rebuild(Complaint.iter_open_for_dedup(db, since))
+    finally:
+        db.close()
+    print(f"Duplicate index ready ({n} open complaints indexed).")
+
+def backfill_dept_ids():
+    """Move rows stored with a routed_to string onto dept_id (one-off after upgrading)"""
+    legacy = {u.routed_to: u.id for u in routing.engine.rules.units.values()}
+    db = SessionLocal()
+    try:
+        n = Complaint.backfill_dept_ids(db, legacy)
+    finally:
+        db.close()
+    if n:
+        print(f"Backfilled dept_id on {n} complaint(s).")
 
 @app.on_event("startup")
 def start_background_tasks():
-    t = threading.Thread(target=escalator_loop, daemon=True)
-    t.start()
-    print("Escalator thread started.")
+    model_manager.warm_up()
+    routing.engine.start_watcher()
+    threading.Thread(target=backfill_dept_ids, name="dept-backfill", daemon=True).start()
+    threading.Thread(target=rebuild_dup_index, name="dup-index", daemon=True).start()
+    escalator.start(escalate_tick)
+    notifier.start()
+
+@app.on_event("shutdown")
+def stop_escalator():
+    escalator.stop()
+
+@app.on_event("shutdown")
+def stop_notifier():
+    notifier.stop()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    # aiosqlite keeps a (non-daemon) thread per pooled connection; release them so the worker can exit
+    if async_engine is not None:
+        await async_engine.dispose()
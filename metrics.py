@@ -0,0 +1,182 @@
+# backend/app/metrics.py
+"""Process-local metrics rendered in the Prometheus text format (GET /metrics).
+
+Counters and histograms are plain dicts behind a lock; an observation costs a few
+microseconds, so instrumentation stays on in production. Each uvicorn worker reports its own
+numbers (scrape every worker, or sum them in the query).
+"""
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+import threading
+import time
+
+from app.inference import Histogram
+
+LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+_registry: List = []
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)) + "}"
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _num(v: float) -> str:
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        # an unlabelled counter reports 0 before its first increment
+        self._values: Dict[Tuple[str, ...], float] = {} if self.label_names else {(): 0.0}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.label_names, k)} {_num(v)}" for k, v in items]
+        return lines
+
+
+class HistogramVec:
+    """One inference.Histogram per label combination"""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: List[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = list(buckets)
+        self._children: Dict[Tuple[str, ...], Histogram] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def labels(self, *label_values: str) -> Histogram:
+        child = self._children.get(label_values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(label_values, Histogram(self.buckets))
+        return child
+
+    def observe(self, value: float, *label_values: str) -> None:
+        self.labels(*label_values).observe(value)
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.labels(*label_values).observe(time.perf_counter() - started)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, hist in children:
+            snap = hist.snapshot()
+            for bound, count in snap["buckets"].items():
+                le = _labels(self.label_names + ("le",), values + (_num(float(bound)),))
+                lines.append(f"{self.name}_bucket{le} {count}")
+            lines.append(f"{self.name}_bucket{_labels(self.label_names + ('le',), values + ('+Inf',))} {snap['count']}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, values)} {snap['sum']!r}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, values)} {snap['count']}")
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time; the callback may return {label tuple: value}.
+
+    kind="counter" exposes a monotonic value that is already counted elsewhere (e.g. cache hits).
+    """
+
+    def __init__(
+        self, name: str, help: str, fn: Callable[[], Union[float, Dict]], labels: Tuple[str, ...] = (), kind: str = "gauge"
+    ):
+        self.name, self.help, self.fn, self.label_names, self.kind = name, help, fn, tuple(labels), kind
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            value = self.fn()
+        except Exception:
+            return lines
+        if isinstance(value, dict):
+            lines += [f"{self.name}{_labels(self.label_names, k)} {_num(v)}" for k, v in sorted(value.items())]
+        else:
+            lines.append(f"{self.name} {_num(value)}")
+        return lines
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in _registry:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+# hot-path instruments (imported by nlp, models and main)
+HTTP_REQUEST_SECONDS = HistogramVec(
+    "sgcrs_http_request_duration_seconds", "Time until response headers are sent, per route", ("method", "route")
+)
+HTTP_REQUESTS = Counter("sgcrs_http_requests_total", "HTTP requests per route and status code", ("method", "route", "status"))
+ANALYZE_STAGE_SECONDS = HistogramVec(
+    "sgcrs_analyze_stage_duration_seconds", "Text analysis time per stage (department, urgency, transformer)", ("stage",)
+)
+DB_COMMIT_SECONDS = HistogramVec("sgcrs_db_commit_duration_seconds", "Time spent in COMMIT per write path", ("op",))
+COMPLAINTS_CREATED = Counter("sgcrs_complaints_created_total", "Stored complaints", ("department", "urgency"))
+ESCALATOR_TICK_SECONDS = HistogramVec("sgcrs_escalator_tick_duration_seconds", "Escalator pass duration")
+ESCALATED = Counter("sgcrs_escalated_total", "Complaints escalated by the escalator")
+NOTIFICATIONS = Counter(
+    "sgcrs_notifications_total", "Outbox notifications by outcome (sent, retry, dead)", ("outcome",)
+)
+NOTIFY_SEND_SECONDS = HistogramVec("sgcrs_notify_send_duration_seconds", "Department digest delivery time", ("transport",))
+
+
+class RequestTimer:
+    """ASGI middleware feeding HTTP_REQUEST_SECONDS / HTTP_REQUESTS.
+
+    Requests are labelled with the route template (/complaints/{complaint_id}), not the raw
+    path, so label cardinality stays bounded. Streaming responses are timed to their headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        sent = False
+
+        def record(status: int) -> None:
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, scope["method"], path)
+            HTTP_REQUESTS.inc(scope["method"], path, str(status))
+
+        async def send_timed(message):
+            nonlocal sent
+            if message["type"] == "http.response.start" and not sent:
+                sent = True
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        except Exception:
+            if not sent:
+                record(500)
+            raise
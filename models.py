@@ -1,11 +1,14 @@
 # backend/app/models.py
-from typing import Optional, List
-from pydantic import BaseModel
-from sqlalchemy import Column, Integer, String, DateTime, Enum, Text
+from typing import Dict, Iterator, Optional, List, Tuple
+from pydantic import BaseModel, root_validator
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Text, Index, case, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 import enum
 import datetime
 from .db import Base
+from .metrics import DB_COMMIT_SECONDS
+from .routing import describe as describe_unit
 
 class ComplaintStatusEnum(str, enum.Enum):
     new = "new"
@@ -20,10 +23,53 @@ class ComplaintModel(Base):
     text = Column(Text)
     department = Column(String(64))
     urgency = Column(String(16))
+    # legacy "<code> | <contact>" string; new rows store dept_id and leave this NULL
     routed_to = Column(String(64))
     reason = Column(Text, default="")
     status = Column(Enum(ComplaintStatusEnum), default=ComplaintStatusEnum.new)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    # id of the first complaint of a near-duplicate cluster (NULL for the first one itself)
+    cluster_id = Column(Integer, index=True, nullable=True)
+    # routing unit id (app.routing); routed_to is derived from it when the row is read
+    dept_id = Column(Integer, index=True, nullable=True)
+    # client-supplied Idempotency-Key / message id; retries with the same key return this row
+    idempotency_key = Column(String(128), nullable=True)
+
+    # composite (filter, id) indexes back the keyset-paginated listing (ORDER BY id DESC)
+    __table_args__ = (
+        Index("ix_complaints_department_id", "department", "id"),
+        Index("ix_complaints_status_id", "status", "id"),
+        Index("ix_complaints_urgency_id", "urgency", "id"),
+        Index("ix_complaints_created_at_id", "created_at", "id"),
+        # lets the escalator find overdue in-progress rows without scanning open complaints
+        Index("ix_complaints_status_created_at", "status", "created_at"),
+        Index("ux_complaints_idempotency_key", "idempotency_key", unique=True),
+    )
+
+class LeaseModel(Base):
+    """Named time-limited locks shared by all processes using the database (see app.escalator)"""
+    __tablename__ = "leases"
+    name = Column(String(64), primary_key=True)
+    holder = Column(String(128), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+class NotificationOutboxModel(Base):
+    """Department notifications waiting for delivery, one row per complaint (see app.notifier).
+
+    Rows are written in the transaction that stores the complaint and deleted once delivered;
+    rows that keep failing stay behind with status "dead".
+    """
+    __tablename__ = "notification_outbox"
+    id = Column(Integer, primary_key=True)
+    complaint_id = Column(Integer, nullable=False)
+    # routing unit the complaint was routed to at ingest
+    dept_id = Column(Integer, nullable=True)
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (Index("ix_notification_outbox_status_next_attempt", "status", "next_attempt_at"),)
 
 # Pydantic schemas
 class ComplaintCreate(BaseModel):
@@ -31,8 +77,11 @@ class ComplaintCreate(BaseModel):
     text: str
     department: str
     urgency: str
-    routed_to: str
+    dept_id: Optional[int] = None
+    routed_to: Optional[str] = None
     reason: Optional[str] = ""
+    cluster_id: Optional[int] = None
+    idempotency_key: Optional[str] = None
 
 class ComplaintRead(BaseModel):
     id: int
@@ -40,14 +89,70 @@ class ComplaintRead(BaseModel):
     text: str
     department: str
     urgency: str
-    routed_to: str
+    routed_to: Optional[str]
     reason: Optional[str]
     status: ComplaintStatusEnum
     created_at: datetime.datetime
+    cluster_id: Optional[int] = None
+    dept_id: Optional[int] = None
 
     class Config:
         orm_mode = True
 
+    @root_validator(skip_on_failure=True)
+    def _derive_routed_to(cls, values):
+        # current code/contact of the routing unit; rows from before dept_id keep their stored string
+        if values.get("dept_id") is not None:
+            values["routed_to"] = describe_unit(values["dept_id"]) or values.get("routed_to")
+        return values
+
+class ComplaintCluster(BaseModel):
+    cluster_id: int
+    size: int
+    open: int
+    department: str
+    text: str
+    last_reported_at: datetime.datetime
+
+class ComplaintStats(BaseModel):
+    total: int
+    by_department: Dict[str, int]
+    by_status: Dict[str, int]
+    by_urgency: Dict[str, int]
+    sla_breached: int
+    sla_on_time: int
+    generated_at: datetime.datetime
+
+def complaint_filters(
+    department: Optional[str] = None,
+    status: Optional[ComplaintStatusEnum] = None,
+    urgency: Optional[str] = None,
+    created_from: Optional[datetime.datetime] = None,
+    created_to: Optional[datetime.datetime] = None,
+) -> list:
+    """WHERE clauses shared by the listing, stats and export queries"""
+    filters = []
+    if department:
+        filters.append(ComplaintModel.department == department)
+    if status:
+        filters.append(ComplaintModel.status == status)
+    if urgency:
+        filters.append(ComplaintModel.urgency == urgency)
+    if created_from:
+        filters.append(ComplaintModel.created_at >= created_from)
+    if created_to:
+        filters.append(ComplaintModel.created_at < created_to)
+    return filters
+
+# columns of a complaint row as exported (NDJSON/CSV), in order
+EXPORT_COLUMNS = [
+    "id", "citizen_name", "text", "department", "urgency", "routed_to", "reason", "status", "created_at", "cluster_id",
+    "dept_id"
+]
+
+def _group_key(k) -> str:
+    return k.value if isinstance(k, enum.Enum) else str(k)
+
 # Convenience DB methods
 class Complaint:
     @staticmethod
@@ -57,20 +162,187 @@ class Complaint:
             text=complaint.text,
             department=complaint.department,
             urgency=complaint.urgency,
+            dept_id=complaint.dept_id,
             routed_to=complaint.routed_to,
             reason=complaint.reason,
-            status=ComplaintStatusEnum.in_progress
+            status=ComplaintStatusEnum.in_progress,
+            cluster_id=complaint.cluster_id,
+            idempotency_key=complaint.idempotency_key
         )
         db.add(m)
-        db.commit()
+        db.flush()
+        # queued for the department digest in the same transaction (delivery is app.notifier's job)
+        db.add(NotificationOutboxModel(complaint_id=m.id, dept_id=m.dept_id))
+        with DB_COMMIT_SECONDS.time("create"):
+            db.commit()
         db.refresh(m)
         return ComplaintRead.from_orm(m)
 
+    @staticmethod
+    def create_idempotent(db: Session, complaint: ComplaintCreate) -> Tuple[ComplaintRead, bool]:
+        """create(), but if a concurrent request already stored the same idempotency key return
+        (that complaint, False) instead of failing; (new complaint, True) otherwise"""
+        try:
+            return Complaint.create(db, complaint), True
+        except IntegrityError:
+            db.rollback()
+            existing = Complaint.get_by_idempotency_key(db, complaint.idempotency_key) if complaint.idempotency_key else None
+            if existing is None:
+                raise
+            return existing, False
+
+    @staticmethod
+    def get_by_idempotency_key(db: Session, key: str) -> Optional[ComplaintRead]:
+        r = db.query(ComplaintModel).filter(ComplaintModel.idempotency_key == key).first()
+        return ComplaintRead.from_orm(r) if r else None
+
+    @staticmethod
+    def ids_for_idempotency_keys(db: Session, keys: List[str]) -> Dict[str, int]:
+        """{key: complaint id} for the keys that are already stored"""
+        found: Dict[str, int] = {}
+        unique = list(dict.fromkeys(keys))
+        # stay well under SQLite's bound-parameter limit
+        for i in range(0, len(unique), 500):
+            stmt = select(ComplaintModel.idempotency_key, ComplaintModel.id).where(
+                ComplaintModel.idempotency_key.in_(unique[i:i + 500])
+            )
+            found.update((k, cid) for k, cid in db.execute(stmt))
+        return found
+
+    @staticmethod
+    def create_many(
+        db: Session, complaints: List[ComplaintCreate], batch_roots: Optional[List[Optional[int]]] = None
+    ) -> List[int]:
+        """Insert all complaints in one transaction (executemany) and return their ids in input order.
+
+        batch_roots[i] = j links complaint i to the cluster of complaint j of the same batch
+        (whose id is only known after the INSERT).
+        """
+        if not complaints:
+            return []
+        now = datetime.datetime.utcnow()
+        rows = [
+            {
+                "citizen_name": c.citizen_name,
+                "text": c.text,
+                "department": c.department,
+                "urgency": c.urgency,
+                "dept_id": c.dept_id,
+                "routed_to": c.routed_to,
+                "reason": c.reason,
+                "status": ComplaintStatusEnum.in_progress,
+                "created_at": now,
+                "cluster_id": c.cluster_id,
+                "idempotency_key": c.idempotency_key,
+            }
+            for c in complaints
+        ]
+        stmt = insert(ComplaintModel).returning(ComplaintModel.id, sort_by_parameter_order=True)
+        ids = list(db.execute(stmt, rows).scalars())
+        links = [
+            {"id": ids[i], "cluster_id": complaints[j].cluster_id or ids[j]}
+            for i, j in enumerate(batch_roots or ()) if j is not None
+        ]
+        if links:
+            db.execute(update(ComplaintModel), links)
+        db.execute(
+            insert(NotificationOutboxModel),
+            [{"complaint_id": cid, "dept_id": c.dept_id, "next_attempt_at": now} for cid, c in zip(ids, complaints)],
+        )
+        with DB_COMMIT_SECONDS.time("create_many"):
+            db.commit()
+        return ids
+
     @staticmethod
     def list_all(db: Session):
         rows = db.query(ComplaintModel).order_by(ComplaintModel.id.desc()).all()
         return [ComplaintRead.from_orm(r) for r in rows]
 
+    @staticmethod
+    def list_page(
+        db: Session,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        department: Optional[str] = None,
+        status: Optional[ComplaintStatusEnum] = None,
+        urgency: Optional[str] = None,
+        created_from: Optional[datetime.datetime] = None,
+        created_to: Optional[datetime.datetime] = None,
+    ) -> List[ComplaintRead]:
+        """Newest-first page of complaints; pass the last id of a page as after_id to get the next one"""
+        q = db.query(ComplaintModel).filter(
+            *complaint_filters(department, status, urgency, created_from, created_to)
+        )
+        if after_id is not None:
+            q = q.filter(ComplaintModel.id < after_id)
+        rows = q.order_by(ComplaintModel.id.desc()).limit(limit).all()
+        return [ComplaintRead.from_orm(r) for r in rows]
+
+    @staticmethod
+    def iter_export_rows(
+        db: Session,
+        batch_size: int = 1000,
+        columns: List[str] = EXPORT_COLUMNS,
+        newest_first: bool = False,
+        limit: Optional[int] = None,
+        **filters
+    ) -> Iterator[tuple]:
+        """Stream plain tuples of `columns` in id order through a server-side cursor, no ORM objects"""
+        order = ComplaintModel.id.desc() if newest_first else ComplaintModel.id
+        # routed_to is derived from dept_id, so fetch it alongside even when it was not asked for
+        routed_at = columns.index("routed_to") if "routed_to" in columns else None
+        selected = [getattr(ComplaintModel, c) for c in columns]
+        if routed_at is not None:
+            selected.append(ComplaintModel.dept_id)
+        stmt = (
+            select(*selected)
+            .where(*complaint_filters(**filters))
+            .order_by(order)
+            .limit(limit)
+            .execution_options(yield_per=batch_size)
+        )
+        if routed_at is None:
+            for row in db.execute(stmt):
+                yield tuple(row)
+            return
+        for row in db.execute(stmt):
+            row = list(row)
+            dept_id = row.pop()
+            if dept_id is not None:
+                row[routed_at] = describe_unit(dept_id) or row[routed_at]
+            yield tuple(row)
+
+    @staticmethod
+    def stats(
+        db: Session,
+        sla_cutoff: datetime.datetime,
+        department: Optional[str] = None,
+        status: Optional[ComplaintStatusEnum] = None,
+    ) -> ComplaintStats:
+        """Dashboard aggregates via GROUP BY; complaints created before sla_cutoff count as SLA-breached"""
+        filters = complaint_filters(department, status)
+
+        def grouped(col) -> Dict[str, int]:
+            rows = db.query(col, func.count(ComplaintModel.id)).filter(*filters).group_by(col)
+            return {_group_key(k): n for k, n in rows}
+
+        by_status = grouped(ComplaintModel.status)
+        total = sum(by_status.values())
+        breached = (
+            db.query(func.count(ComplaintModel.id))
+            .filter(*filters, ComplaintModel.created_at < sla_cutoff)
+            .scalar()
+        )
+        return ComplaintStats(
+            total=total,
+            by_department=grouped(ComplaintModel.department),
+            by_status=by_status,
+            by_urgency=grouped(ComplaintModel.urgency),
+            sla_breached=breached,
+            sla_on_time=total - breached,
+            generated_at=datetime.datetime.utcnow(),
+        )
+
     @staticmethod
     def get(db: Session, cid: int):
         r = db.query(ComplaintModel).filter(ComplaintModel.id == cid).first()
@@ -82,11 +354,142 @@ class Complaint:
         if not r:
             return None
         r.status = status
-        db.commit()
+        with DB_COMMIT_SECONDS.time("update_status"):
+            db.commit()
         db.refresh(r)
         return ComplaintRead.from_orm(r)
 
+    @staticmethod
+    def escalate_overdue(db: Session, cutoff: datetime.datetime) -> List[int]:
+        """Escalate every in-progress complaint created before cutoff in one UPDATE ... RETURNING"""
+        stmt = (
+            update(ComplaintModel)
+            .where(ComplaintModel.status == ComplaintStatusEnum.in_progress, ComplaintModel.created_at < cutoff)
+            .values(status=ComplaintStatusEnum.escalated)
+            .returning(ComplaintModel.id)
+            .execution_options(synchronize_session=False)
+        )
+        ids = list(db.execute(stmt).scalars())
+        with DB_COMMIT_SECONDS.time("escalate"):
+            db.commit()
+        return ids
+
+    @staticmethod
+    def iter_open_for_dedup(db: Session, since: datetime.datetime) -> Iterator[tuple]:
+        """(id, text, department, cluster_id) of recent unresolved complaints, for the duplicate index"""
+        stmt = (
+            select(ComplaintModel.id, ComplaintModel.text, ComplaintModel.department, ComplaintModel.cluster_id)
+            .where(ComplaintModel.status != ComplaintStatusEnum.resolved, ComplaintModel.created_at >= since)
+            .order_by(ComplaintModel.id)
+            .execution_options(yield_per=1000)
+        )
+        for row in db.execute(stmt):
+            yield tuple(row)
+
+    @staticmethod
+    def list_clusters(db: Session, department: Optional[str] = None, limit: int = 50) -> List[ComplaintCluster]:
+        """Largest near-duplicate clusters first (root complaint + linked duplicates)"""
+        members = ComplaintModel.__table__.alias("members")
+        open_member = func.sum(case((members.c.status != ComplaintStatusEnum.resolved, 1), else_=0))
+        q = (
+            select(
+                members.c.cluster_id,
+                func.count().label("duplicates"),
+                open_member.label("open_duplicates"),
+                func.max(members.c.created_at).label("last_reported_at"),
+            )
+            .where(members.c.cluster_id.isnot(None))
+            .group_by(members.c.cluster_id)
+            .order_by(func.count().desc())
+            .limit(limit)
+        )
+        if department:
+            q = q.where(members.c.department == department)
+        groups = db.execute(q).all()
+        roots = {
+            r.id: r for r in db.query(ComplaintModel).filter(ComplaintModel.id.in_([g.cluster_id for g in groups]))
+        }
+        clusters = []
+        for g in groups:
+            root = roots.get(g.cluster_id)
+            if root is None:
+                continue
+            root_open = root.status != ComplaintStatusEnum.resolved
+            clusters.append(ComplaintCluster(
+                cluster_id=g.cluster_id,
+                size=g.duplicates + 1,
+                open=g.open_duplicates + int(root_open),
+                department=root.department,
+                text=root.text,
+                last_reported_at=max(g.last_reported_at, root.created_at),
+            ))
+        return clusters
+
+    @staticmethod
+    def cluster_members(db: Session, cluster_id: int) -> List[ComplaintRead]:
+        rows = (
+            db.query(ComplaintModel)
+            .filter((ComplaintModel.id == cluster_id) | (ComplaintModel.cluster_id == cluster_id))
+            .order_by(ComplaintModel.id)
+            .all()
+        )
+        return [ComplaintRead.from_orm(r) for r in rows]
+
+    @staticmethod
+    def backfill_dept_ids(db: Session, legacy: Dict[str, int]) -> int:
+        """Replace stored routed_to strings with routing unit ids ({"<code> | <contact>": id}); returns rows changed"""
+        pending = select(ComplaintModel.id).where(ComplaintModel.dept_id.is_(None), ComplaintModel.routed_to.isnot(None))
+        if db.execute(pending.limit(1)).first() is None:
+            return 0
+        changed = 0
+        for routed_to, dept_id in legacy.items():
+            stmt = (
+                update(ComplaintModel)
+                .where(ComplaintModel.dept_id.is_(None), ComplaintModel.routed_to == routed_to)
+                .values(dept_id=dept_id, routed_to=None)
+                .execution_options(synchronize_session=False)
+            )
+            changed += db.execute(stmt).rowcount
+        db.commit()
+        return changed
+
     @staticmethod
     def list_open(db: Session):
         rows = db.query(ComplaintModel).filter(ComplaintModel.status != ComplaintStatusEnum.resolved).all()
         return rows
+
+class NotificationOutbox:
+    @staticmethod
+    def due(db: Session, now: datetime.datetime, limit: int = 1000) -> List[Tuple]:
+        """Pending notifications whose next attempt is due, oldest first, joined with their complaint:
+        (outbox id, dept_id, attempts, complaint id, department, urgency, text, created_at)"""
+        stmt = (
+            select(
+                NotificationOutboxModel.id,
+                NotificationOutboxModel.dept_id,
+                NotificationOutboxModel.attempts,
+                ComplaintModel.id,
+                ComplaintModel.department,
+                ComplaintModel.urgency,
+                ComplaintModel.text,
+                ComplaintModel.created_at,
+            )
+            .join(ComplaintModel, ComplaintModel.id == NotificationOutboxModel.complaint_id)
+            .where(NotificationOutboxModel.status == "pending", NotificationOutboxModel.next_attempt_at <= now)
+            .order_by(NotificationOutboxModel.id)
+            .limit(limit)
+        )
+        return [tuple(r) for r in db.execute(stmt)]
+
+    @staticmethod
+    def mark_sent(db: Session, ids: List[int]) -> None:
+        for i in range(0, len(ids), 500):
+            db.execute(delete(NotificationOutboxModel).where(NotificationOutboxModel.id.in_(ids[i:i + 500])))
+        db.commit()
+
+    @staticmethod
+    def mark_failed(db: Session, retries: List[Dict]) -> None:
+        """retries: [{"id", "attempts", "next_attempt_at", "status", "last_error"}] (UPDATE by primary key)"""
+        if retries:
+            db.execute(update(NotificationOutboxModel), retries)
+            db.commit()
@@ -1,20 +1,113 @@
 # backend/app/nlp.py
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
+import hashlib
 import re
 import os
+import threading
+import time
+from app.cache import LRUCache
+from app.inference import MicroBatcher
+from app.metrics import ANALYZE_STAGE_SECONDS
 
 # Try to use a small HuggingFace model if internet available.
 # If not available, fallback to deterministic rule-based logic.
-USE_TRANSFORMER = False
-try:
-    from transformers import pipeline
-    # use a small model to reduce download time - change if necessary
-    classifier = pipeline("text-classification", model="distilbert-base-uncased-finetuned-sst-2-english")
-    USE_TRANSFORMER = True
-except Exception as e:
-    # no internet or transformers not installed, fallback
-    print("Transformer not available; using rule-based classifier. Reason:", e)
-    USE_TRANSFORMER = False
+# The model is loaded lazily in a background thread (see ModelManager) so importing this
+# module never blocks on torch or a model download.
+USE_TRANSFORMER = os.getenv("SGCRS_USE_TRANSFORMER", "1") != "0"
+# use a small model to reduce download time - change if necessary
+MODEL_NAME = os.getenv("SGCRS_MODEL_NAME", "distilbert-base-uncased-finetuned-sst-2-english")
+
+class ModelManager:
+    """Owns the transformer pipeline: loads it once, off the request path.
+
+    get() never blocks: until the background load finishes it returns None and callers
+    use the rule-based path only.
+    """
+    NOT_LOADED = "not_loaded"
+    LOADING = "loading"
+    READY = "ready"
+    UNAVAILABLE = "unavailable"
+    DISABLED = "disabled"
+
+    def __init__(self, model_name: str, enabled: bool = True):
+        self.model_name = model_name
+        self.state = self.NOT_LOADED if enabled else self.DISABLED
+        self.error = ""
+        self.load_seconds: Optional[float] = None
+        self.version = 0  # bumped whenever a (new) model becomes active
+        self._pipeline = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def warm_up(self, block: bool = False) -> None:
+        """Start loading the model in a background thread (no-op if already started)"""
+        with self._lock:
+            if self.state == self.NOT_LOADED:
+                self.state = self.LOADING
+                self._thread = threading.Thread(target=self._load, name="model-loader", daemon=True)
+                self._thread.start()
+            thread = self._thread
+        if block and thread is not None:
+            thread.join()
+
+    def _load(self) -> None:
+        started = time.perf_counter()
+        try:
+            from transformers import pipeline
+            self._pipeline = pipeline("text-classification", model=self.model_name)
+            self.version += 1
+            self.state = self.READY
+        except Exception as e:
+            # no internet or transformers not installed, fallback
+            print("Transformer not available; using rule-based classifier. Reason:", e)
+            self.error = str(e)
+            self.state = self.UNAVAILABLE
+        self.load_seconds = time.perf_counter() - started
+
+    def get(self):
+        """Return the pipeline if it is ready, else None (and kick off loading on first use)"""
+        if self.state == self.READY:
+            return self._pipeline
+        if self.state == self.NOT_LOADED:
+            self.warm_up()
+        return None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == self.READY
+
+    def status(self) -> Dict:
+        return {
+            "model": self.model_name,
+            "state": self.state,
+            "ready": self.ready,
+            "version": self.version,
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+        }
+
+model_manager = ModelManager(MODEL_NAME, enabled=USE_TRANSFORMER)
+
+# how many texts the transformer sees per forward pass in analyze_texts
+TRANSFORMER_BATCH_SIZE = int(os.getenv("SGCRS_TRANSFORMER_BATCH_SIZE", "64"))
+
+# concurrent analyze_text calls are coalesced into one forward pass (see inference.MicroBatcher)
+MICROBATCH_ENABLED = os.getenv("SGCRS_MICROBATCH", "1") != "0"
+MICROBATCH_MAX_SIZE = int(os.getenv("SGCRS_MICROBATCH_MAX_SIZE", "32"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("SGCRS_MICROBATCH_MAX_WAIT_MS", "5"))
+
+def _score_batch(texts: List[str]) -> List:
+    classifier = model_manager.get()
+    if classifier is None:
+        raise RuntimeError("transformer not loaded")
+    return classifier(texts, top_k=3, batch_size=len(texts))
+
+# content-addressed analyze_text results; keys include keyword and model versions
+ANALYSIS_CACHE_SIZE = int(os.getenv("SGCRS_ANALYSIS_CACHE_SIZE", "10000"))
+ANALYSIS_CACHE_TTL = float(os.getenv("SGCRS_ANALYSIS_CACHE_TTL", "0"))  # seconds, 0 = no expiry
+analysis_cache = LRUCache(maxsize=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_CACHE_TTL)
+
+transformer_batcher = MicroBatcher(_score_batch, max_batch=MICROBATCH_MAX_SIZE, max_wait_ms=MICROBATCH_MAX_WAIT_MS)
 
 # Department keywords mapping (expand for your demo)
 DEPT_KEYWORDS = {
@@ -28,43 +121,201 @@ DEPT_KEYWORDS = {
 
 URGENT_WORDS = ["urgent", "danger", "accident", "fire", "hospital", "collapse", "unsafe", "critical"]
 
-def simple_department_from_text(text: str) -> str:
-    t = text.lower()
-    counts = {}
-    for dept, kws in DEPT_KEYWORDS.items():
-        for k in kws:
-            if k in t:
-                counts[dept] = counts.get(dept, 0) + 1
+LOW_URGENCY_RE = re.compile(r'\b(minor|small|not urgent|low priority)\b')
+
+def _alternation(words: List[str]) -> str:
+    # longest first, so at any position the longest keyword is the one reported
+    return "|".join(re.escape(w) for w in sorted(set(words), key=len, reverse=True))
+
+def _trie_pattern(words: List[str]) -> str:
+    """Regex for a set of words factored on common prefixes ("drain(?:age)?", "b(?:ridge|u(?:lb|s))").
+
+    The engine then picks a branch by the next character instead of trying every keyword at
+    each position, and the optional tails are greedy, so the longest keyword at a position wins.
+    """
+    trie: Dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        if "" in node:
+            return "(?:" + "|".join(branches) + ")?"
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+class KeywordMatcher:
+    """Finds department and urgency keyword hits with two regexes compiled once per keyword table.
+
+    Department keywords match as substrings anywhere in the lowercased text (as before). One
+    prefix-factored pattern finds the longest keyword at the next position that has one; the
+    search resumes one character later, so overlapping keywords are found too, and Python only
+    runs once per hit. A hit also counts the shorter keywords it contains ("drainage" ->
+    "drain"). Urgent words match as whole words through one ``\\b(...)\\b`` alternation.
+    """
+
+    def __init__(self, dept_keywords: Dict[str, List[str]], urgent_words: List[str], version: int = 0):
+        self.version = version
+        self.departments = list(dept_keywords)
+        # keyword -> departments listing it (once per listing, as the old per-keyword loop counted)
+        self._owners: Dict[str, List[str]] = {}
+        for dept, kws in dept_keywords.items():
+            for kw in kws:
+                if kw:
+                    self._owners.setdefault(kw.lower(), []).append(dept)
+        keywords = list(self._owners)
+        # keyword -> every keyword seen along with it (itself and the keywords it contains)
+        self._implied = {k: tuple(other for other in keywords if other in k) for k in keywords}
+        self._dept_re = re.compile(_trie_pattern(sorted(keywords))) if keywords else None
+        words = [w.lower() for w in urgent_words if w]
+        self._urgent_re = re.compile(r'\b(' + _alternation(words) + r')\b') if words else None
+
+    def scan(self, t: str) -> Tuple[Dict[str, int], bool]:
+        """Scan already-lowercased text; return ({department: keyword hits}, has_urgent_word)"""
+        found = set()
+        if self._dept_re is not None:
+            search = self._dept_re.search
+            m = search(t)
+            while m is not None:
+                found.update(self._implied[m.group()])
+                m = search(t, m.start() + 1)
+        urgent = self._urgent_re is not None and self._urgent_re.search(t) is not None
+
+        hits: Dict[str, int] = {}
+        for k in found:
+            for dept in self._owners[k]:
+                hits[dept] = hits.get(dept, 0) + 1
+        # in DEPT_KEYWORDS order (keeps tie-breaking stable)
+        counts = {dept: hits[dept] for dept in self.departments if dept in hits}
+        return counts, urgent
+
+_matcher = KeywordMatcher(DEPT_KEYWORDS, URGENT_WORDS)
+
+def reload_keywords(dept_keywords: Optional[Dict[str, List[str]]] = None, urgent_words: Optional[List[str]] = None) -> int:
+    """Swap in new keyword tables without a restart; returns the new keyword version.
+
+    Cached analyses are keyed on the keyword version, so results computed under the old
+    tables are never served again; the cache is also cleared to free them right away.
+    """
+    global DEPT_KEYWORDS, URGENT_WORDS, _matcher
+    if dept_keywords is not None:
+        DEPT_KEYWORDS = dict(dept_keywords)
+    if urgent_words is not None:
+        URGENT_WORDS = list(urgent_words)
+    _matcher = KeywordMatcher(DEPT_KEYWORDS, URGENT_WORDS, version=_matcher.version + 1)
+    analysis_cache.clear()
+    return _matcher.version
+
+def keywords_version() -> int:
+    return _matcher.version
+
+def _department_from_counts(counts: Dict[str, int]) -> str:
     if counts:
         # return department with max count
         return max(counts.items(), key=lambda x: x[1])[0]
     # fallback general
     return "General Administration"
 
-def predict_urgency(text: str) -> str:
-    t = text.lower()
-    for w in URGENT_WORDS:
-        if re.search(r'\b' + re.escape(w) + r'\b', t):
-            return "High"
+def _urgency_from_scan(t: str, urgent: bool) -> str:
+    if urgent:
+        return "High"
     # if says "not important" or "small", low:
-    if re.search(r'\b(minor|small|not urgent|low priority)\b', t):
+    if LOW_URGENCY_RE.search(t):
         return "Low"
     return "Medium"
 
+def classify_rules(text: str) -> Tuple[str, str]:
+    """Rule-based (department, urgency) from a single keyword scan"""
+    started = time.perf_counter()
+    t = text.lower()
+    counts, urgent = _matcher.scan(t)
+    department = _department_from_counts(counts)
+    scanned = time.perf_counter()
+    urgency = _urgency_from_scan(t, urgent)
+    # the keyword scan also yields the urgent-word flag; it is accounted to the department stage
+    ANALYZE_STAGE_SECONDS.observe(scanned - started, "department")
+    ANALYZE_STAGE_SECONDS.observe(time.perf_counter() - scanned, "urgency")
+    return department, urgency
+
+def simple_department_from_text(text: str) -> str:
+    counts, _ = _matcher.scan(text.lower())
+    return _department_from_counts(counts)
+
+def predict_urgency(text: str) -> str:
+    t = text.lower()
+    _, urgent = _matcher.scan(t)
+    return _urgency_from_scan(t, urgent)
+
+def _analysis_key(text: str) -> Tuple[bytes, int, int]:
+    """Content address of a text under the current keyword tables and model"""
+    digest = hashlib.blake2b(text.strip().lower().encode("utf-8"), digest_size=16).digest()
+    return digest, _matcher.version, model_manager.version
+
 def analyze_text(text: str) -> Dict:
     """Return {'department':..., 'urgency':..., 'reason':...}"""
+    key = _analysis_key(text)
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        return dict(cached)
+
     reason = ""
+    ok = True
     # If transformer is available, optionally use sentiment or classification to augment urgency
-    if USE_TRANSFORMER:
+    classifier = model_manager.get()
+    if classifier is not None:
         try:
-            out = classifier(text, top_k=3)
+            with ANALYZE_STAGE_SECONDS.time("transformer"):
+                if MICROBATCH_ENABLED:
+                    out = transformer_batcher(text)
+                else:
+                    out = classifier(text, top_k=3)
             # out is list of dicts with label & score; for SST-2 labels: POSITIVE/NEGATIVE
             # We'll use negative sentiment + urgent words to boost urgency
             labels = [d["label"] for d in out]
             reason = f"Transformer labels: {labels}"
         except Exception as e:
             reason = f"Transformer failed: {e}"
+            ok = False
+
+    department, urgency = classify_rules(text)
+    result = {"department": department, "urgency": urgency, "reason": reason}
+    if ok:
+        analysis_cache.set(key, result)
+    return dict(result)
+
+def analyze_texts(texts: List[str]) -> List[Dict]:
+    """Batch version of analyze_text: cached and duplicate texts are skipped, the rest
+    go through the transformer in one pass"""
+    keys = [_analysis_key(t) for t in texts]
+    cached = [analysis_cache.get(k) for k in keys]
+    pending: Dict[Tuple[bytes, int, int], int] = {}
+    for i, (k, c) in enumerate(zip(keys, cached)):
+        if c is None and k not in pending:
+            pending[k] = i
+    todo = [texts[i] for i in pending.values()]
+
+    reasons = [""] * len(todo)
+    ok = True
+    classifier = model_manager.get()
+    if classifier is not None and todo:
+        try:
+            with ANALYZE_STAGE_SECONDS.time("transformer_batch"):
+                outs = classifier(todo, top_k=3, batch_size=TRANSFORMER_BATCH_SIZE)
+            reasons = [f"Transformer labels: {[d['label'] for d in out]}" for out in outs]
+        except Exception as e:
+            reasons = [f"Transformer failed: {e}"] * len(todo)
+            ok = False
 
-    department = simple_department_from_text(text)
-    urgency = predict_urgency(text)
-    return {"department": department, "urgency": urgency, "reason": reason}
+    computed = {}
+    for k, t, r in zip(pending, todo, reasons):
+        department, urgency = classify_rules(t)
+        computed[k] = {"department": department, "urgency": urgency, "reason": r}
+        if ok:
+            analysis_cache.set(k, computed[k])
+    return [dict(c if c is not None else computed[k]) for k, c in zip(keys, cached)]
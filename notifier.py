@@ -0,0 +1,371 @@
+# backend/app/notifier.py
+"""Department notifications: outbox rows are delivered as per-department digests.
+
+Complaint.create / create_many queue one notification_outbox row per complaint in the same
+transaction that stores it, so ingest never waits on a mail server or webhook. This module
+drains the outbox every NOTIFY_INTERVAL seconds, in back-to-back passes of BATCH_ROWS while a
+backlog lasts (renewing the lease before each one). Due rows are grouped by routing unit and each
+group is sent as one digest from a small thread pool. Each worker thread keeps its SMTP / HTTP
+connection open between digests. A failed digest is retried with exponential backoff; after
+MAX_ATTEMPTS its rows are marked "dead". Delivery is at-least-once: a crash between sending and
+deleting the rows sends that digest again.
+
+Like the escalator, every API worker runs the loop but only the holder of the "notifier" lease
+delivers. To run it on its own (and set SGCRS_NOTIFIER=off for the API workers):
+
+    python -m app.notifier
+
+Transports (SGCRS_NOTIFY_TRANSPORT): "log" prints digests (default), "smtp" mails them to the
+unit's contact via SGCRS_SMTP_HOST, "webhook" POSTs JSON to SGCRS_NOTIFY_WEBHOOK_URL. For local
+testing, `python -m app.notifier --stub 8025` starts an HTTP receiver that prints what it gets:
+
+    SGCRS_NOTIFY_TRANSPORT=webhook SGCRS_NOTIFY_WEBHOOK_URL=http://127.0.0.1:8025/digest
+"""
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import argparse
+import datetime
+import http.client
+import json
+import os
+import random
+import signal
+import smtplib
+import threading
+
+from app import routing
+from app.db import SessionLocal, init_db
+from app.escalator import Lease
+from app.metrics import NOTIFICATIONS, NOTIFY_SEND_SECONDS
+from app.models import NotificationOutbox
+
+# "lease": API workers compete for the lease; "off": the API never delivers (standalone runner)
+NOTIFIER_MODE = os.getenv("SGCRS_NOTIFIER", "lease")
+TRANSPORT = os.getenv("SGCRS_NOTIFY_TRANSPORT", "log")
+# seconds between outbox passes; complaints arriving in between share a digest
+NOTIFY_INTERVAL = float(os.getenv("SGCRS_NOTIFY_INTERVAL", "15"))
+NOTIFY_WORKERS = int(os.getenv("SGCRS_NOTIFY_WORKERS", "4"))
+BATCH_ROWS = int(os.getenv("SGCRS_NOTIFY_BATCH_ROWS", "2000"))  # outbox rows per pass
+DIGEST_MAX = 200  # complaints per digest
+MAX_ATTEMPTS = int(os.getenv("SGCRS_NOTIFY_MAX_ATTEMPTS", "8"))
+BACKOFF_SECONDS = 30.0  # first retry; doubles per attempt, with jitter
+BACKOFF_MAX = 3600.0
+SEND_TIMEOUT = 10.0
+
+SMTP_HOST = os.getenv("SGCRS_SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SGCRS_SMTP_PORT", "25"))
+SMTP_FROM = os.getenv("SGCRS_SMTP_FROM", "sgcrs@example.gov")
+WEBHOOK_URL = os.getenv("SGCRS_NOTIFY_WEBHOOK_URL")
+
+LEASE_NAME = "notifier"
+LEASE_SECONDS = int(os.getenv("SGCRS_NOTIFIER_LEASE_SECONDS", str(int(3 * NOTIFY_INTERVAL) + 60)))
+
+# one outbox row joined with its complaint (see NotificationOutbox.due)
+Row = Tuple[int, Optional[int], int, int, str, str, str, datetime.datetime]
+
+
+def digest_payload(unit: routing.Unit, rows: List[Row]) -> Dict:
+    return {
+        "department": unit.name,
+        "code": unit.code,
+        "contact": unit.contact,
+        "count": len(rows),
+        "complaints": [
+            {"id": cid, "department": dept, "urgency": urgency, "text": text, "created_at": created_at.isoformat()}
+            for _, _, _, cid, dept, urgency, text, created_at in rows
+        ],
+    }
+
+
+def digest_text(payload: Dict) -> str:
+    lines = [f"{payload['count']} new complaint(s) routed to {payload['department']} ({payload['code']}):", ""]
+    for c in payload["complaints"]:
+        text = c["text"] if len(c["text"]) <= 200 else c["text"][:197] + "..."
+        lines.append(f"#{c['id']} [{c['urgency']}] {c['created_at'][:16]}  {text}")
+    return "\n".join(lines) + "\n"
+
+
+class LogSender:
+    name = "log"
+
+    def send(self, payload: Dict) -> None:
+        print(f"[Notifier] to {payload['contact']}:\n{digest_text(payload)}", end="")
+
+    def close(self) -> None:
+        pass
+
+
+class PooledSender:
+    """Keeps one connection per worker thread and reuses it across digests; a connection that
+    fails is dropped and the next digest opens a fresh one"""
+
+    name = "pooled"
+
+    def __init__(self):
+        self._local = threading.local()
+        self._conns: List = []
+        self._lock = threading.Lock()
+
+    def connect(self):
+        raise NotImplementedError
+
+    def deliver(self, conn, payload: Dict) -> None:
+        raise NotImplementedError
+
+    def disconnect(self, conn) -> None:
+        conn.close()
+
+    def send(self, payload: Dict) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self.connect()
+            with self._lock:
+                self._conns.append(conn)
+        try:
+            self.deliver(conn, payload)
+        except Exception:
+            self._local.conn = None
+            self._close(conn)
+            raise
+
+    def _close(self, conn) -> None:
+        with self._lock:
+            if conn in self._conns:
+                self._conns.remove(conn)
+        try:
+            self.disconnect(conn)
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        with self._lock:
+            conns = list(self._conns)
+        for conn in conns:
+            self._close(conn)
+
+
+class SMTPSender(PooledSender):
+    name = "smtp"
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, sender: str = SMTP_FROM):
+        super().__init__()
+        self.host, self.port, self.sender = host, port, sender
+
+    def connect(self):
+        return smtplib.SMTP(self.host, self.port, timeout=SEND_TIMEOUT)
+
+    def deliver(self, conn, payload: Dict) -> None:
+        msg = EmailMessage()
+        msg["From"] = self.sender
+        msg["To"] = payload["contact"]
+        msg["Subject"] = f"[SGCRS] {payload['count']} new complaint(s) for {payload['department']}"
+        msg.set_content(digest_text(payload))
+        conn.send_message(msg)
+
+    def disconnect(self, conn) -> None:
+        conn.quit()
+
+
+class WebhookSender(PooledSender):
+    name = "webhook"
+
+    def __init__(self, url: Optional[str] = WEBHOOK_URL):
+        super().__init__()
+        if not url:
+            raise ValueError("SGCRS_NOTIFY_WEBHOOK_URL is not set")
+        parts = urlsplit(url)
+        self.https = parts.scheme == "https"
+        self.netloc = parts.netloc
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+    def connect(self):
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.netloc, timeout=SEND_TIMEOUT)
+
+    def deliver(self, conn, payload: Dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        conn.request("POST", self.path, body=body, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        resp.read()  # drain so the connection can be reused
+        if resp.status >= 300:
+            raise RuntimeError(f"webhook answered {resp.status} {resp.reason}")
+
+
+def make_sender(transport: str = TRANSPORT):
+    if transport == "smtp":
+        return SMTPSender()
+    if transport == "webhook":
+        return WebhookSender()
+    if transport == "log":
+        return LogSender()
+    raise ValueError(f"unknown SGCRS_NOTIFY_TRANSPORT {transport!r} (log, smtp or webhook)")
+
+
+def backoff(attempts: int) -> float:
+    """Delay before retry number `attempts` (1-based): BACKOFF_SECONDS doubling, capped, +-20% jitter"""
+    delay = min(BACKOFF_MAX, BACKOFF_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _send_digest(sender, unit: routing.Unit, rows: List[Row]) -> None:
+    with NOTIFY_SEND_SECONDS.time(sender.name):
+        sender.send(digest_payload(unit, rows))
+
+
+def deliver_pending(sender, pool: ThreadPoolExecutor) -> int:
+    """One outbox pass: send due rows as per-unit digests; returns how many rows it took (sent or
+    rescheduled), so BATCH_ROWS means there may be more due"""
+    now = datetime.datetime.utcnow()
+    db = SessionLocal()
+    try:
+        rows = NotificationOutbox.due(db, now, limit=BATCH_ROWS)
+    finally:
+        db.close()
+    if not rows:
+        return 0
+
+    rules = routing.engine.rules
+    groups: Dict[routing.Unit, List[Row]] = {}
+    for row in rows:
+        # a unit dropped by a routing reload falls back to the default department
+        unit = rules.units.get(row[1]) if row[1] is not None else None
+        groups.setdefault(unit or rules.default, []).append(row)
+    digests = [
+        (unit, group[i:i + DIGEST_MAX]) for unit, group in groups.items() for i in range(0, len(group), DIGEST_MAX)
+    ]
+    futures = [(pool.submit(_send_digest, sender, unit, chunk), unit, chunk) for unit, chunk in digests]
+
+    sent: List[int] = []
+    retries: List[Dict] = []
+    delivered = 0
+    for future, unit, chunk in futures:
+        try:
+            future.result()
+            sent += [r[0] for r in chunk]
+            delivered += 1
+        except Exception as e:
+            print(f"[Notifier] digest for {unit.name} ({len(chunk)} complaint(s)) failed: {e}")
+            for outbox_id, _, attempts, *_ in chunk:
+                attempts += 1
+                dead = attempts >= MAX_ATTEMPTS
+                retries.append({
+                    "id": outbox_id,
+                    "attempts": attempts,
+                    "status": "dead" if dead else "pending",
+                    "next_attempt_at": now + datetime.timedelta(seconds=backoff(attempts)),
+                    "last_error": str(e)[:500],
+                })
+                NOTIFICATIONS.inc("dead" if dead else "retry")
+
+    db = SessionLocal()
+    try:
+        if sent:
+            NotificationOutbox.mark_sent(db, sent)
+        NotificationOutbox.mark_failed(db, retries)
+    finally:
+        db.close()
+    NOTIFICATIONS.inc("sent", amount=len(sent))
+    if sent:
+        print(f"[Notifier] {len(sent)} complaint(s) delivered in {delivered} digest(s).")
+    return len(rows)
+
+
+lease = Lease(LEASE_NAME, ttl=LEASE_SECONDS)
+_stop = threading.Event()
+
+
+def notifier_loop() -> None:
+    """Drain the outbox every NOTIFY_INTERVAL while holding the lease, until stop() is called.
+
+    A full pass is followed by another one straight away (failed rows are rescheduled, so they do
+    not come back in it); the lease is renewed before every pass so a long drain keeps it.
+    """
+    sender = make_sender()
+    pool = ThreadPoolExecutor(max_workers=NOTIFY_WORKERS, thread_name_prefix="notifier")
+    try:
+        while not _stop.is_set():
+            try:
+                while not _stop.is_set() and lease.acquire():
+                    if deliver_pending(sender, pool) < BATCH_ROWS:
+                        break
+            except Exception as e:
+                print("Notifier error:", e)
+            _stop.wait(NOTIFY_INTERVAL)
+    finally:
+        pool.shutdown(wait=True)
+        sender.close()
+
+
+def start() -> Optional[threading.Thread]:
+    """Start the loop in a daemon thread unless SGCRS_NOTIFIER=off"""
+    if NOTIFIER_MODE == "off":
+        print("Notifier disabled in this process (SGCRS_NOTIFIER=off).")
+        return None
+    _stop.clear()
+    t = threading.Thread(target=notifier_loop, name="notifier", daemon=True)
+    t.start()
+    print(f"Notifier thread started ({TRANSPORT}).")
+    return t
+
+
+def stop() -> None:
+    _stop.set()
+    try:
+        lease.release()
+    except Exception as e:
+        print("Notifier error:", e)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real webhook receiver
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            print(f"[Stub] {self.path}:\n{digest_text(json.loads(body))}", end="", flush=True)
+            status = 204
+        except (ValueError, KeyError) as e:
+            print("[Stub] bad digest:", e, flush=True)
+            status = 400
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_stub(port: int) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", port), _StubHandler)
+    print(f"Notification stub listening on http://127.0.0.1:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deliver queued department notifications")
+    parser.add_argument("--stub", type=int, metavar="PORT", help="run a local webhook receiver instead")
+    args = parser.parse_args()
+    if args.stub:
+        run_stub(args.stub)
+        return
+    init_db()
+    signal.signal(signal.SIGTERM, lambda *_: _stop.set())
+    print(f"Notifier running as {lease.holder} ({TRANSPORT}, every {NOTIFY_INTERVAL}s, {NOTIFY_WORKERS} workers).")
+    try:
+        notifier_loop()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,43 @@
 # backend/app/routing.py
+"""Routing engine: department units, keyword rules and ward overrides, hot-reloadable.
+
+Rules come from a JSON file (SGCRS_ROUTING_FILE) or, without one, the built-in table below:
+
+    {
+      "departments": [
+        {"id": 1, "name": "Water Supply", "code": "WTR-001", "contact": "water_dept@example.gov",
+         "keywords": ["water", "tap", "leak"]},
+        ...
+      ],
+      "default_department": "General Administration",
+      "urgent_words": ["urgent", "danger"],
+      "overrides": [
+        {"ward": "Anna Nagar", "department": "Water Supply",
+         "id": 101, "code": "WTR-001-AN", "contact": "annanagar.water@example.gov"}
+      ]
+    }
+
+Each department and override is a routing unit with a stable integer id; complaint rows store
+that id (dept_id) and the "<code> | <contact>" string is derived when a row is read. An
+override sends complaints that mention its ward (for one department, or for all when
+"department" is omitted) to its own unit.
+
+The file is compiled into an immutable RoutingRules object and swapped in with one reference
+assignment, so requests never see a half-loaded table. The watcher polls the file's mtime and
+reloads it without a restart; a file that fails to load leaves the current rules in place.
+"""
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional, Tuple
+import json
+import os
+import re
+import threading
+import time
+
+from app import nlp
+
+ROUTING_FILE = os.getenv("SGCRS_ROUTING_FILE")
+RELOAD_SECONDS = float(os.getenv("SGCRS_ROUTING_RELOAD_SECONDS", "5"))
 
 ROUTING_TABLE = {
     "Water Supply": {"dept_code": "WTR-001", "contact": "water_dept@example.gov"},
@@ -9,8 +48,167 @@ ROUTING_TABLE = {
     "Public Transport": {"dept_code": "PT-006", "contact": "transport_dept@example.gov"},
     "General Administration": {"dept_code": "ADM-999", "contact": "admin_dept@example.gov"},
 }
+DEFAULT_DEPARTMENT = "General Administration"
+
+
+class Unit(NamedTuple):
+    id: int
+    name: str
+    code: str
+    contact: str
+
+    @property
+    def routed_to(self) -> str:
+        # In the prototype we return "<dept_code> | <contact>"
+        return f"{self.code} | {self.contact}"
+
+
+class RoutingRules:
+    """Compiled, read-only routing tables for one version of the rules"""
+
+    def __init__(self, config: Dict, version: int = 0, source: str = "built-in"):
+        self.version = version
+        self.source = source
+        units: Dict[int, Unit] = {}
+        by_name: Dict[str, Unit] = {}
+        keywords: Dict[str, List[str]] = {}
+
+        def add(entry: Dict) -> Unit:
+            unit = Unit(int(entry["id"]), entry["name"], entry["code"], entry["contact"])
+            if unit.id in units:
+                raise ValueError(f"duplicate routing unit id {unit.id}")
+            units[unit.id] = unit
+            return unit
+
+        for entry in config["departments"]:
+            unit = add(entry)
+            by_name[unit.name] = unit
+            if entry.get("keywords"):
+                keywords[unit.name] = list(entry["keywords"])
+        default = config.get("default_department", DEFAULT_DEPARTMENT)
+        if default not in by_name:
+            raise ValueError(f"default department {default!r} is not defined")
+
+        overrides: Dict[Tuple[str, Optional[str]], Unit] = {}
+        for entry in config.get("overrides", []):
+            ward = entry["ward"].lower()
+            department = entry.get("department")
+            if department is not None and department not in by_name:
+                raise ValueError(f"override for ward {entry['ward']!r} names unknown department {department!r}")
+            unit = add(dict(entry, name=entry.get("name") or f"{department or 'All'} ({entry['ward']})"))
+            overrides[(ward, department)] = unit
+
+        self.units: Mapping[int, Unit] = MappingProxyType(units)
+        self.by_name: Mapping[str, Unit] = MappingProxyType(by_name)
+        self.default = by_name[default]
+        self.keywords = keywords
+        self.urgent_words = config.get("urgent_words")
+        self._overrides = overrides
+        wards = sorted({w for w, _ in overrides}, key=len, reverse=True)
+        self._ward_re = re.compile(r"\b(" + "|".join(re.escape(w) for w in wards) + r")\b") if wards else None
+
+    def department_names(self) -> List[str]:
+        return list(self.by_name)
+
+    def route(self, department: str, text: Optional[str] = None) -> Unit:
+        """Unit for a classified department, honouring ward overrides mentioned in text"""
+        if text and self._ward_re is not None:
+            m = self._ward_re.search(text.lower())
+            if m:
+                ward = m.group(1)
+                unit = self._overrides.get((ward, department)) or self._overrides.get((ward, None))
+                if unit is not None:
+                    return unit
+        return self.by_name.get(department, self.default)
+
+    def describe(self, unit_id: Optional[int]) -> Optional[str]:
+        unit = self.units.get(unit_id) if unit_id is not None else None
+        return unit.routed_to if unit else None
+
+
+def builtin_config() -> Dict:
+    departments = []
+    for name, info in ROUTING_TABLE.items():
+        departments.append({
+            # the numeric part of the department code doubles as a stable id
+            "id": int(info["dept_code"].split("-")[-1]),
+            "name": name,
+            "code": info["dept_code"],
+            "contact": info["contact"],
+            "keywords": nlp.DEPT_KEYWORDS.get(name, []),
+        })
+    return {"departments": departments, "default_department": DEFAULT_DEPARTMENT, "urgent_words": nlp.URGENT_WORDS}
+
+
+class RoutingEngine:
+    def __init__(self, path: Optional[str] = ROUTING_FILE):
+        self.path = path
+        self.rules = RoutingRules(builtin_config())
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+
+    def load(self) -> RoutingRules:
+        """(Re)compile the rules file and swap it in; keyword rules are pushed to the classifier"""
+        with self._lock:
+            if not self.path:
+                return self.rules
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, encoding="utf-8") as f:
+                config = json.load(f)
+            rules = RoutingRules(config, version=self.rules.version + 1, source=self.path)
+            if rules.keywords or rules.urgent_words:
+                nlp.reload_keywords(rules.keywords or None, rules.urgent_words)
+            self.rules = rules
+            self._mtime = mtime
+        print(f"Routing rules v{rules.version} loaded from {self.path} ({len(rules.units)} units).")
+        return rules
+
+    def reload_if_changed(self) -> bool:
+        if not self.path:
+            return False
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError as e:
+            if self._mtime != -1:
+                print("Routing file unavailable; keeping current rules:", e)
+                self._mtime = -1
+            return False
+        if mtime == self._mtime:
+            return False
+        try:
+            self.load()
+            return True
+        except Exception as e:
+            # report a broken file once; it is retried when it changes again
+            self._mtime = mtime
+            print("Routing reload failed; keeping current rules:", e)
+            return False
+
+    def _watch(self) -> None:
+        while True:
+            time.sleep(RELOAD_SECONDS)
+            self.reload_if_changed()
+
+    def start_watcher(self) -> None:
+        if self.path and self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="routing-watcher", daemon=True)
+            self._watcher.start()
+
+
+engine = RoutingEngine()
+if engine.path:
+    engine.reload_if_changed()
+
+
+def route(department: str, text: Optional[str] = None) -> Unit:
+    return engine.rules.route(department, text)
+
+
+def describe(unit_id: Optional[int]) -> Optional[str]:
+    """"<code> | <contact>" of a routing unit id under the current rules"""
+    return engine.rules.describe(unit_id)
+
 
 def route_to_department(department_name: str) -> str:
-    info = ROUTING_TABLE.get(department_name, ROUTING_TABLE["General Administration"])
-    # In the prototype we return "<dept_code> - <contact>"
-    return f"{info['dept_code']} | {info['contact']}"
+    return route(department_name).routed_to
@@ -0,0 +1,98 @@
+# backend/app/search.py
+"""Full-text search over complaint text and citizen name (SQLite FTS5).
+
+complaints_fts is an external-content FTS5 table over complaints(text, citizen_name); triggers
+keep it in sync with every INSERT/DELETE and with UPDATEs that touch the indexed columns
+(status changes from the API or escalator do not touch the index).
+"""
+from typing import List, Optional
+import re
+
+from sqlalchemy import select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models import ComplaintModel, ComplaintRead, ComplaintStatusEnum
+
+FTS_TABLE = "complaints_fts"
+
+_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text, citizen_name, content='complaints', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS complaints_fts_ai AFTER INSERT ON complaints BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text, citizen_name) VALUES (new.id, new.text, new.citizen_name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS complaints_fts_ad AFTER DELETE ON complaints BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text, citizen_name)
+        VALUES ('delete', old.id, old.text, old.citizen_name);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS complaints_fts_au AFTER UPDATE OF text, citizen_name ON complaints BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text, citizen_name)
+        VALUES ('delete', old.id, old.text, old.citizen_name);
+        INSERT INTO {FTS_TABLE}(rowid, text, citizen_name) VALUES (new.id, new.text, new.citizen_name);
+    END""",
+]
+
+_TERM_RE = re.compile(r"\w+")
+
+
+class SearchUnavailable(Exception):
+    pass
+
+
+def init_fts(engine: Engine) -> None:
+    """Create the FTS table and triggers (SQLite only); index existing rows the first time"""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (FTS_TABLE,)
+        ).first()
+        for ddl in _FTS_DDL:
+            conn.exec_driver_sql(ddl)
+        if not exists:
+            conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def fts_query(q: str) -> str:
+    """Turn free user input into a safe FTS5 query: every word must match (implicit AND)"""
+    return " ".join(f'"{term}"' for term in _TERM_RE.findall(q))
+
+
+def search_complaints(
+    db: Session,
+    q: str,
+    department: Optional[str] = None,
+    status: Optional[ComplaintStatusEnum] = None,
+    limit: int = 20,
+    offset: int = 0,
+    sort: str = "rank",
+) -> List[ComplaintRead]:
+    """Best matches first (bm25 rank), or newest first with sort="recent", optionally
+    restricted to a department/status.
+
+    Ranking scores every matching row, so very common terms are cheaper with sort="recent",
+    which walks the index in rowid order and stops after the page.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        raise SearchUnavailable("full-text search needs the SQLite FTS5 backend")
+    match = fts_query(q)
+    if not match:
+        return []
+    where = [f"{FTS_TABLE} MATCH :match"]
+    params = {"match": match, "limit": limit, "offset": offset}
+    if department:
+        where.append("c.department = :department")
+        params["department"] = department
+    if status:
+        # Enum columns store the member name
+        where.append("c.status = :status")
+        params["status"] = status.name
+    order = "f.rowid DESC" if sort == "recent" else "f.rank"
+    sql = text(
+        f"SELECT c.* FROM {FTS_TABLE} f JOIN complaints c ON c.id = f.rowid "
+        f"WHERE {' AND '.join(where)} ORDER BY {order} LIMIT :limit OFFSET :offset"
+    )
+    rows = db.execute(select(ComplaintModel).from_statement(sql), params).scalars().all()
+    return [ComplaintRead.from_orm(r) for r in rows]
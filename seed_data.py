@@ -1,15 +1,31 @@
 # backend/app/seed_data.py
-from faker import Faker
-import random
+"""Seed / bulk-load complaints.
+
+    python -m app.seed_data                         # 100 synthetic complaints (old behaviour)
+    python -m app.seed_data generate 1000000        # 1M synthetic complaints for capacity tests
+    python -m app.seed_data import complaints.jsonl # one JSON object per line
+
+Texts are classified in parallel across a process pool and rows are written with
+executemany INSERTs, one transaction per chunk.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+import argparse
+import collections
 import datetime
-from app.db import SessionLocal, init_db
-from app.models import Complaint, ComplaintCreate
-from app.nlp import analyze_text
-from app.routing import route_to_department
+import json
+import os
+import random
+import sys
+import time
+
+from faker import Faker
+from sqlalchemy import insert
 
-fake = Faker()
-init_db()
-db = SessionLocal()
+from app.db import SessionLocal, init_db
+from app.models import ComplaintModel, ComplaintStatusEnum
+from app.nlp import analyze_texts, classify_rules
+from app import routing
 
 sample_issues = [
     "Water leakage from main pipe near the school.",
@@ -24,50 +40,171 @@ sample_issues = [
     "Fire hydrant blocked by garbage near the park.",
 ]
 
+suffixes = ["in Anna Nagar.", "near Bus Stand.", "since 2 days.", "urgent attention needed.", "not resolved yet."]
+
 statuses = ["in_progress", "resolved", "escalated"]
+# any status the model knows is accepted on import
+IMPORT_STATUSES = {s.value for s in ComplaintStatusEnum}
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def synthetic_complaints(n: int, rng: Optional[random.Random] = None) -> Iterator[Dict]:
+    """Random seed-style complaints created within the last 15 days"""
+    rng = rng or random.Random()
+    now = datetime.datetime.utcnow()
+    # names come from a Faker seeded off rng, so a seeded rng reproduces them too
+    faker = Faker()
+    faker.seed_instance(rng.getrandbits(64))
+    # Faker is slow per call; a pool of names keeps generation well ahead of classification
+    names = [faker.name() for _ in range(min(n, 1000))]
+    for _ in range(n):
+        # randomize a bit by adding location or urgency keywords
+        text = rng.choice(sample_issues) + " " + rng.choice(suffixes)
+        yield {
+            "citizen_name": rng.choice(names),
+            "text": text,
+            "status": rng.choice(statuses),
+            "created_at": now - datetime.timedelta(days=rng.randint(0, 15)),
+        }
+
+
+def read_jsonl(path: str) -> Iterator[Dict]:
+    """Complaints from a JSONL file; uses "text", or "title"/"body" (e.g. requests.jsonl)"""
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            rec = json.loads(line)
+            text = rec.get("text") or ". ".join(p for p in (rec.get("title"), rec.get("body")) if p)
+            if not text:
+                print(f"skipping line {line_no}: no text", file=sys.stderr)
+                continue
+            row = {"citizen_name": rec.get("citizen_name") or rec.get("name") or "Anonymous", "text": text}
+            if rec.get("status") in IMPORT_STATUSES:
+                row["status"] = rec["status"]
+            if rec.get("created_at"):
+                row["created_at"] = datetime.datetime.fromisoformat(rec["created_at"])
+            yield row
+
+
+def _chunks(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _classify_chunk(texts: List[str], use_transformer: bool = False) -> List[tuple]:
+    """(department, urgency, reason) per text; runs in a worker process"""
+    if use_transformer:
+        return [(a["department"], a["urgency"], a["reason"]) for a in analyze_texts(texts)]
+    return [classify_rules(t) + ("",) for t in texts]
+
+
+def _to_mappings(chunk: List[Dict], analyses: List[tuple], rules: "routing.RoutingRules") -> List[Dict]:
+    now = datetime.datetime.utcnow()
+    out = []
+    for row, (dept, urgency, reason) in zip(chunk, analyses):
+        out.append({
+            "citizen_name": row.get("citizen_name", "Anonymous"),
+            "text": row["text"],
+            "department": dept,
+            "urgency": urgency,
+            "dept_id": rules.route(dept, row["text"]).id,
+            "reason": reason,
+            "status": ComplaintStatusEnum(row.get("status", "in_progress")),
+            "created_at": row.get("created_at", now),
+        })
+    return out
+
+
+def load(
+    rows: Iterable[Dict],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = 0,
+    use_transformer: bool = False,
+    verbose: bool = True,
+) -> int:
+    """Classify and insert rows chunk by chunk; returns the number of rows written.
+
+    With workers > 1, chunks are classified in a process pool while the parent inserts;
+    at most 2 * workers chunks are in flight so memory stays bounded.
+    """
+    init_db()
+    rules = routing.engine.rules
+    written = 0
+    started = time.perf_counter()
+    db = SessionLocal()
+
+    def write(chunk, analyses):
+        nonlocal written
+        db.execute(insert(ComplaintModel), _to_mappings(chunk, analyses, rules))
+        db.commit()
+        written += len(chunk)
+        if verbose:
+            elapsed = time.perf_counter() - started
+            print(f"  {written} rows, {written / elapsed:,.0f} rows/s")
+
+    try:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                in_flight = collections.deque()
+                for chunk in _chunks(rows, chunk_size):
+                    in_flight.append((chunk, pool.submit(_classify_chunk, [r["text"] for r in chunk], use_transformer)))
+                    if len(in_flight) >= 2 * workers:
+                        chunk, fut = in_flight.popleft()
+                        write(chunk, fut.result())
+                while in_flight:
+                    chunk, fut = in_flight.popleft()
+                    write(chunk, fut.result())
+        else:
+            for chunk in _chunks(rows, chunk_size):
+                write(chunk, _classify_chunk([r["text"] for r in chunk], use_transformer))
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    if verbose:
+        print(f"✅ {written} complaints loaded in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f} rows/s)")
+    return written
+
+
+def seed(n: int = 100) -> int:
+    print(f"🌱 Seeding {n} sample grievances...")
+    return load(synthetic_complaints(n), verbose=False)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command")
+    gen = sub.add_parser("generate", help="insert N synthetic complaints")
+    gen.add_argument("count", type=int)
+    gen.add_argument("--seed", type=int, help="random seed for reproducible data")
+    imp = sub.add_parser("import", help="insert complaints from a JSONL file")
+    imp.add_argument("path")
+    for p in (gen, imp):
+        p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="classifier processes (1 = inline)")
+        p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per INSERT transaction")
+        p.add_argument("--transformer", action="store_true", help="also run the transformer (slow)")
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        seed(100)
+        print("✅ Database seeded successfully with 100 records.")
+        return
+
+    if args.command == "generate":
+        rows = synthetic_complaints(args.count, random.Random(args.seed))
+    else:
+        rows = read_jsonl(args.path)
+    load(rows, chunk_size=args.chunk_size, workers=args.workers, use_transformer=args.transformer)
+
 
-print("🌱 Seeding 100 sample grievances...")
-for i in range(100):
-    citizen = fake.name()
-    text = random.choice(sample_issues)
-    # randomize a bit by adding location or urgency keywords
-    text += " " + random.choice(["in Anna Nagar.", "near Bus Stand.", "since 2 days.", "urgent attention needed.", "not resolved yet."])
-    
-    analysis = analyze_text(text)
-    dept = analysis["department"]
-    urgency = analysis["urgency"]
-    reason = analysis["reason"]
-    routed_to = route_to_department(dept)
-
-    # Random status
-    status = random.choice(statuses)
-
-    # Random created time (within last 15 days)
-    created_time = datetime.datetime.utcnow() - datetime.timedelta(days=random.randint(0, 15))
-
-    complaint_data = ComplaintCreate(
-        citizen_name=citizen,
-        text=text,
-        department=dept,
-        urgency=urgency,
-        routed_to=routed_to,
-        reason=reason,
-    )
-
-    # manually use model to allow setting created_at and status
-    from app.models import ComplaintModel
-    c = ComplaintModel(
-        citizen_name=citizen,
-        text=text,
-        department=dept,
-        urgency=urgency,
-        routed_to=routed_to,
-        reason=reason,
-        status=status,
-        created_at=created_time,
-    )
-    db.add(c)
-
-db.commit()
-db.close()
-print("✅ Database seeded successfully with 100 records.")
+if __name__ == "__main__":
+    main()
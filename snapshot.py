@@ -0,0 +1,115 @@
+# backend/app/snapshot.py
+"""Columnar complaint snapshots (Apache Arrow IPC stream or Parquet) for the dashboard and analytics.
+
+Low-cardinality columns (department, urgency, status, routed_to) are dictionary-encoded and
+created_at is a native timestamp, so clients get pandas categoricals/datetimes without parsing
+JSON or re-parsing dates. Rows are streamed in record batches of SNAPSHOT_BATCH_ROWS.
+"""
+from typing import Iterable, Iterator, List
+import io
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency: the endpoint answers 501 without it
+    pa = None
+    pq = None
+
+from app.db import SessionLocal
+from app.models import Complaint, ComplaintStatusEnum, EXPORT_COLUMNS
+
+SNAPSHOT_BATCH_ROWS = 65536
+DICTIONARY_COLUMNS = {"department", "urgency", "status", "routed_to"}
+FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class SnapshotUnavailable(Exception):
+    pass
+
+
+def parse_columns(spec: str) -> List[str]:
+    """"id,department" -> ["id", "department"] (EXPORT_COLUMNS order is kept); ValueError on unknown names"""
+    if not spec:
+        return list(EXPORT_COLUMNS)
+    wanted = {c.strip() for c in spec.split(",") if c.strip()}
+    unknown = wanted - set(EXPORT_COLUMNS)
+    if unknown:
+        raise ValueError(f"unknown column(s): {', '.join(sorted(unknown))}")
+    return [c for c in EXPORT_COLUMNS if c in wanted]
+
+
+def arrow_schema(columns: List[str]):
+    types = {"id": pa.int64(), "cluster_id": pa.int64(), "dept_id": pa.int64(), "created_at": pa.timestamp("us")}
+    fields = []
+    for c in columns:
+        if c in DICTIONARY_COLUMNS:
+            fields.append(pa.field(c, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(c, types.get(c, pa.string())))
+    return pa.schema(fields)
+
+
+def record_batches(rows: Iterable[tuple], columns: List[str], schema) -> Iterator:
+    status_at = columns.index("status") if "status" in columns else None
+    batch: List[tuple] = []
+
+    def build():
+        cols = list(zip(*batch))
+        if status_at is not None:
+            cols[status_at] = [s.value if isinstance(s, ComplaintStatusEnum) else s for s in cols[status_at]]
+        arrays = []
+        for field, values in zip(schema, cols):
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, field.type))
+        return pa.record_batch(arrays, schema=schema)
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= SNAPSHOT_BATCH_ROWS:
+            yield build()
+            batch = []
+    if batch:
+        yield build()
+
+
+def _drain(buf: io.BytesIO) -> bytes:
+    data = buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+    return data
+
+
+def snapshot_chunks(fmt: str, columns: List[str], limit=None, **filters) -> Iterator[bytes]:
+    """Encode matching complaints (newest first) batch by batch; the session stays open only while streaming"""
+    schema = arrow_schema(columns)
+    buf = io.BytesIO()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(buf, schema)
+        write = writer.write_batch
+    else:
+        writer = pa.ipc.new_stream(buf, schema)
+        write = writer.write_batch
+    db = SessionLocal()
+    try:
+        rows = Complaint.iter_export_rows(
+            db, batch_size=SNAPSHOT_BATCH_ROWS, columns=columns, newest_first=True, limit=limit, **filters
+        )
+        for batch in record_batches(rows, columns, schema):
+            write(batch)
+            yield _drain(buf)
+        writer.close()
+        yield _drain(buf)
+    finally:
+        db.close()
+
+
+def check_available(fmt: str) -> None:
+    if pa is None:
+        raise SnapshotUnavailable("columnar snapshots need pyarrow (pip install pyarrow)")
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
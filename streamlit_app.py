@@ -5,12 +5,23 @@ import plotly.express as px
 import time
 from datetime import datetime, timedelta
 
+try:
+    import pyarrow as pa
+except ImportError:  # fall back to JSON pages
+    pa = None
+
 # =========================================
 # CONFIGURATION
 # =========================================
 API_BASE = "http://127.0.0.1:8000"
-REFRESH_INTERVAL = 30  # seconds
+REFRESH_INTERVAL = 30  # seconds (fallback polling when the backend has no /events feed)
+EVENT_WAIT = 25  # seconds a /events long-poll may wait for a change
+RESET_BACKOFF_MAX = 300  # seconds; longest wait before refetching after repeated feed resets
 SLA_HOURS = 48  # threshold for SLA
+PAGE_SIZE = 500  # rows per /complaints request
+MAX_ROWS = 500  # newest complaints shown in the table (KPIs and charts come from /stats)
+# columns the dashboard needs from /complaints/snapshot (text/reason/routed_to are never shown)
+SNAPSHOT_COLUMNS = ["id", "citizen_name", "department", "urgency", "status", "created_at"]
 
 st.set_page_config(
     page_title="Smart Grievance Dashboard",
@@ -32,30 +43,158 @@ st.markdown(
 # =========================================
 # HELPER FUNCTIONS
 # =========================================
-def fetch_complaints():
-    """Fetch complaints data from FastAPI backend"""
+def fetch_departments():
+    """Department names known to the backend (for the filter dropdown)"""
     try:
-        res = requests.get(f"{API_BASE}/complaints")
+        res = requests.get(f"{API_BASE}/departments")
         if res.status_code == 200:
-            data = res.json()
-            df = pd.DataFrame(data)
-            if df.empty:
-                return pd.DataFrame()
+            return res.json()
+    except Exception:
+        pass
+    return []
 
-            df["created_at"] = pd.to_datetime(df["created_at"])
-            df["sla_deadline"] = df["created_at"] + pd.to_timedelta(SLA_HOURS, unit="h")
-            df["sla_breached"] = df["sla_deadline"] < datetime.utcnow()
+def fetch_stats(department=None, status=None):
+    """Fetch server-side aggregates (KPIs, per-department/status counts, SLA breaches)"""
+    params = {"sla_hours": SLA_HOURS}
+    if department:
+        params["department"] = department
+    if status:
+        params["status"] = status
+    try:
+        res = requests.get(f"{API_BASE}/stats", params=params)
+        if res.status_code == 200:
+            return res.json()
+        st.error("❌ Could not fetch statistics.")
+    except Exception as e:
+        st.error(f"⚠ API not reachable: {e}")
+    return None
 
-            urgency_map = {"High": 90, "Medium": 60, "Low": 30}
-            df["urgency_score"] = df["urgency"].map(urgency_map).fillna(0)
-            return df
-        else:
-            st.error("❌ Could not fetch complaints.")
-            return pd.DataFrame()
+def fetch_events(since=None, epoch=None, timeout=0):
+    """Change-feed entries after `since` of `epoch` (long-poll up to `timeout` s); None if the feed is unavailable"""
+    params = {"timeout": timeout}
+    if since is not None:
+        params["since"] = since
+    if epoch is not None:
+        params["epoch"] = epoch
+    try:
+        res = requests.get(f"{API_BASE}/events", params=params, timeout=timeout + 10)
+        if res.status_code == 200:
+            return res.json()
+    except Exception:
+        pass
+    return None
+
+def complaints_frame(data):
+    """DataFrame of complaint dicts (or an Arrow-backed frame) with the derived SLA/urgency columns"""
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    if df.empty:
+        return pd.DataFrame()
+
+    if not pd.api.types.is_datetime64_any_dtype(df["created_at"]):
+        df["created_at"] = pd.to_datetime(df["created_at"])
+    df["sla_deadline"] = df["created_at"] + pd.to_timedelta(SLA_HOURS, unit="h")
+    df["sla_breached"] = df["sla_deadline"] < datetime.utcnow()
+
+    urgency_map = {"High": 90, "Medium": 60, "Low": 30}
+    df["urgency_score"] = df["urgency"].map(urgency_map).fillna(0)
+    return df
+
+def fetch_complaints_arrow(department=None, status=None):
+    """Newest complaints as an Arrow IPC stream; None if pyarrow or the endpoint is unavailable"""
+    if pa is None:
+        return None
+    params = {"format": "arrow", "limit": MAX_ROWS, "columns": ",".join(SNAPSHOT_COLUMNS)}
+    if department:
+        params["department"] = department
+    if status:
+        params["status"] = status
+    res = requests.get(f"{API_BASE}/complaints/snapshot", params=params)
+    if res.status_code != 200:
+        return None
+    # the reader maps record batches straight onto the response buffer (no copy, no parsing)
+    table = pa.ipc.open_stream(pa.py_buffer(res.content)).read_all()
+    return table.to_pandas()
+
+def fetch_complaints(department=None, status=None):
+    """Fetch complaints data from FastAPI backend (filtered server-side, newest first)"""
+    try:
+        df = fetch_complaints_arrow(department=department, status=status)
+        if df is not None:
+            return complaints_frame(df)
+
+        # JSON keyset pages (older backends / no pyarrow)
+        params = {"limit": PAGE_SIZE}
+        if department:
+            params["department"] = department
+        if status:
+            params["status"] = status
+        data = []
+        while len(data) < MAX_ROWS:
+            res = requests.get(f"{API_BASE}/complaints", params=params)
+            if res.status_code != 200:
+                st.error("❌ Could not fetch complaints.")
+                return pd.DataFrame()
+            data.extend(res.json())
+            next_after_id = res.headers.get("X-Next-After-Id")
+            if not next_after_id:
+                break
+            params["after_id"] = next_after_id
+
+        return complaints_frame(data)
     except Exception as e:
         st.error(f"⚠ API not reachable: {e}")
         return pd.DataFrame()
 
+def apply_events(df, events, department=None, status=None):
+    """Patch the cached complaints DataFrame with change-feed events; None if a full refetch is needed"""
+    for e in events:
+        if e["type"] == "created":
+            c = e.get("complaint")
+            if c is None:
+                return None  # batch insert: the event carries ids only
+            if (department is None or c["department"] == department) and (status is None or c["status"] == status):
+                df = pd.concat([complaints_frame([c]), df], ignore_index=True)
+        elif not df.empty:
+            known = df["id"].isin(e["ids"])
+            if status is not None and e["status"] == status and known.sum() < len(e["ids"]):
+                return None  # rows moved into the filtered view that we do not have
+            if isinstance(df["status"].dtype, pd.CategoricalDtype):
+                df["status"] = df["status"].astype(object)  # Arrow snapshots arrive dictionary-encoded
+            df.loc[known, "status"] = e["status"]
+    if status is not None and not df.empty:
+        df = df[df["status"] == status]
+    return df.head(MAX_ROWS).reset_index(drop=True)
+
+def load_dashboard(department=None, status=None):
+    """Stats and complaints for the current filters.
+
+    The first load (and any filter change) fetches everything; later reruns only replay the
+    change feed onto the cached DataFrame and refresh /stats when something actually changed.
+    """
+    ss = st.session_state
+    key = (department, status)
+    if ss.get("filters") == key and "df" in ss and ss.get("seq") is not None:
+        update = ss.pop("pending_update", None) or fetch_events(ss["seq"], ss.get("epoch"))
+        if update is not None and not update["reset"]:
+            df = apply_events(ss["df"], update["events"], department, status)
+            if df is not None:
+                ss["seq"] = update["seq"]
+                ss["epoch"] = update.get("epoch")
+                ss["df"] = df
+                if update["events"]:
+                    ss["stats"] = fetch_stats(department=department, status=status)
+                return ss["stats"], ss["df"]
+
+    # take the feed position before fetching so nothing committed in between is lost
+    update = fetch_events()
+    ss.pop("pending_update", None)
+    ss["filters"] = key
+    ss["seq"] = update["seq"] if update else None
+    ss["epoch"] = update.get("epoch") if update else None
+    ss["stats"] = fetch_stats(department=department, status=status)
+    ss["df"] = fetch_complaints(department=department, status=status)
+    return ss["stats"], ss["df"]
+
 def update_status(complaint_id, new_status):
     """Update complaint status"""
     try:
@@ -82,27 +221,24 @@ st.title("📊 Smart Grievance Classification & Routing Dashboard")
 st.caption("AI-powered monitoring panel for SGCRS system")
 
 st.sidebar.header("⚙ Filters & Controls")
-auto_refresh = st.sidebar.checkbox("Auto-refresh every 30s", value=True)
-filter_dept = st.sidebar.text_input("Filter by Department")
+auto_refresh = st.sidebar.checkbox("Live updates", value=True)
+filter_dept = st.sidebar.selectbox("Filter by Department", ["All"] + fetch_departments())
 filter_status = st.sidebar.selectbox("Filter by Status", ["All", "in_progress", "resolved", "escalated"])
 
 # =========================================
 # FETCH DATA
 # =========================================
-df = fetch_complaints()
-
-if not df.empty:
-    if filter_dept:
-        df = df[df["department"].str.contains(filter_dept, case=False, na=False)]
-    if filter_status != "All":
-        df = df[df["status"] == filter_status]
+selected_dept = None if filter_dept == "All" else filter_dept
+selected_status = None if filter_status == "All" else filter_status
+stats, df = load_dashboard(department=selected_dept, status=selected_status)
 
+if stats and stats["total"] and not df.empty:
     # KPIs
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Total Complaints", len(df))
-    col2.metric("In Progress", (df["status"] == "in_progress").sum())
-    col3.metric("Resolved", (df["status"] == "resolved").sum())
-    col4.metric("SLA Breached", df["sla_breached"].sum())
+    col1.metric("Total Complaints", stats["total"])
+    col2.metric("In Progress", stats["by_status"].get("in_progress", 0))
+    col3.metric("Resolved", stats["by_status"].get("resolved", 0))
+    col4.metric("SLA Breached", stats["sla_breached"])
 
     # =========================================
     # URGENT ALERTS
@@ -136,6 +272,8 @@ if not df.empty:
     # MAIN TABLE
     # =========================================
     st.subheader("📋 Complaints Overview")
+    st.caption(f"Showing the {len(df)} most recent of {stats['total']} complaints")
+    df = df.copy()  # keep the cached frame free of display columns
     df["Urgency Level"] = df["urgency_score"].apply(urgency_label)
     # Add a nicely formatted SLA Deadline column to the table
     try:
@@ -166,16 +304,18 @@ if not df.empty:
     st.subheader("📈 Department & Status Analytics")
     colA, colB = st.columns(2)
     with colA:
+        dept_counts = pd.DataFrame(list(stats["by_department"].items()), columns=["department", "id"])
         dept_fig = px.bar(
-            df.groupby("department")["id"].count().reset_index(),
+            dept_counts,
             x="department", y="id", title="Complaints per Department",
             color="department", text_auto=True
         )
         st.plotly_chart(dept_fig, use_container_width=True)
 
     with colB:
+        status_counts = pd.DataFrame(list(stats["by_status"].items()), columns=["status", "count"])
         status_fig = px.pie(
-            df, names="status", title="Complaint Status Distribution",
+            status_counts, names="status", values="count", title="Complaint Status Distribution",
             color_discrete_sequence=px.colors.qualitative.Pastel
         )
         st.plotly_chart(status_fig, use_container_width=True)
@@ -184,8 +324,11 @@ if not df.empty:
     # SLA BREACH ANALYSIS
     # =========================================
     st.subheader("⏰ SLA Compliance Overview")
+    sla_counts = pd.DataFrame(
+        [(True, stats["sla_breached"]), (False, stats["sla_on_time"])], columns=["sla_breached", "id"]
+    )
     sla_fig = px.bar(
-        df.groupby("sla_breached")["id"].count().reset_index(),
+        sla_counts,
         x="sla_breached", y="id", color="sla_breached",
         title="SLA Breach vs On-Time Complaints",
         text_auto=True,
@@ -214,5 +357,28 @@ def safe_rerun():
                 pass
 
 if auto_refresh:
-    time.sleep(REFRESH_INTERVAL)
+    if st.session_state.get("seq") is None:
+        # backend without a change feed: fall back to periodic full refreshes
+        time.sleep(REFRESH_INTERVAL)
+        st.session_state.pop("df", None)
+    else:
+        # block on the change feed; idle dashboards only hold an open request
+        while True:
+            update = fetch_events(st.session_state["seq"], st.session_state.get("epoch"), timeout=EVENT_WAIT)
+            if update is None:
+                time.sleep(REFRESH_INTERVAL)
+                st.session_state.pop("df", None)
+                break
+            if update["reset"]:
+                # the feed position is from another worker or a restarted backend; back off so a
+                # multi-worker deployment (a new epoch on most polls) does not refetch in a loop
+                resets = st.session_state.get("resets", 0)
+                st.session_state["resets"] = resets + 1
+                time.sleep(min(REFRESH_INTERVAL * 2 ** resets, RESET_BACKOFF_MAX))
+                st.session_state["pending_update"] = update
+                break
+            st.session_state["resets"] = 0
+            if update["events"]:
+                st.session_state["pending_update"] = update
+                break
     safe_rerun()
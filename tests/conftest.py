@@ -0,0 +1,44 @@
+# backend/app/tests/conftest.py
+"""Shared test setup: a throwaway SQLite database, no transformer, no background workers.
+
+The environment is set before anything imports app.db, which reads SGCRS_DATABASE_URL at
+import time. The tests import the backend as the ``app`` package; when the checkout is not
+a directory named ``app`` (as in backend/app), it is registered under that name here.
+
+Run with:  python -m pytest -q
+"""
+import importlib.machinery
+import os
+import sys
+import tempfile
+import types
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+_tmpdir = tempfile.mkdtemp(prefix="sgcrs-tests-")
+
+os.environ["SGCRS_DATABASE_URL"] = f"sqlite:///{_tmpdir}/sgcrs_test.db"
+os.environ["SGCRS_USE_TRANSFORMER"] = "0"
+os.environ["SGCRS_ESCALATOR"] = "off"
+os.environ["SGCRS_NOTIFIER"] = "off"
+
+if "app" not in sys.modules:
+    if ROOT.name == "app":
+        sys.path.insert(0, str(ROOT.parent))
+    else:
+        package = types.ModuleType("app")
+        package.__path__ = [str(ROOT)]
+        package.__spec__ = importlib.machinery.ModuleSpec("app", None, is_package=True)
+        package.__spec__.submodule_search_locations = package.__path__
+        sys.modules["app"] = package
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
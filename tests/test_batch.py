@@ -0,0 +1,21 @@
+# backend/app/tests/test_batch.py
+from app import main
+
+
+def test_batch_stores_items_in_order(client):
+    texts = ["Water pipe burst near the temple", "Streetlight not working on 5th cross"]
+    r = client.post("/analyze/batch", json={"items": [{"text": t} for t in texts]})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["count"] == 2 and body["replayed"] == 0
+    stored = [client.get(f"/complaints/{cid}").json()["text"] for cid in body["ids"]]
+    assert stored == texts
+
+
+def test_batch_over_limit_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(main, "MAX_BATCH_ITEMS", 3)
+    r = client.post("/analyze/batch", json={"items": [{"text": f"garbage pile {i}"} for i in range(4)]})
+    assert r.status_code == 413
+
+    r = client.post("/analyze/batch", json={"items": [{"text": f"garbage pile {i}"} for i in range(3)]})
+    assert r.status_code == 200
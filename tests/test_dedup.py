@@ -0,0 +1,81 @@
+# backend/app/tests/test_dedup.py
+from app import dedup
+from app.dedup import NearDuplicateIndex, signature
+
+TEXT = "streetlight broken near the main bus stop on elm road since monday"
+SIG = signature(TEXT)
+DEPT = "Electricity"
+
+
+def full_cluster(size=dedup.CLUSTER_SAMPLE + 3):
+    """Index with complaints 1..size in the cluster rooted at 1"""
+    index = NearDuplicateIndex()
+    indexed = [index.add(cid, SIG, DEPT, None if cid == 1 else 1) for cid in range(1, size + 1)]
+    return index, indexed
+
+
+def test_cluster_sample_cap():
+    index, indexed = full_cluster()
+    assert indexed == [True] * dedup.CLUSTER_SAMPLE + [False] * 3
+    assert len(index) == dedup.CLUSTER_SAMPLE
+    match = index.find(SIG, DEPT)
+    assert match.cluster_id == 1 and match.similarity == 1.0
+    assert index.find(SIG, "Water Supply") is None
+
+
+def test_resolved_members_are_replaced_from_reserve():
+    index, _ = full_cluster()
+    for cid in range(1, dedup.CLUSTER_SAMPLE + 1):
+        index.remove(cid)
+    # the reserve members took the freed places, oldest first
+    assert len(index) == 3
+    assert index.find(SIG, DEPT).complaint_id == dedup.CLUSTER_SAMPLE + 1
+    for cid in range(dedup.CLUSTER_SAMPLE + 1, dedup.CLUSTER_SAMPLE + 4):
+        index.remove(cid)
+    assert len(index) == 0 and index.find(SIG, DEPT) is None
+
+
+def test_readding_an_indexed_member_keeps_it():
+    index, _ = full_cluster()
+    assert index.add(2, SIG, DEPT, 1)
+    assert len(index) == dedup.CLUSTER_SAMPLE
+
+
+def test_find_many_links_items_of_the_same_batch():
+    index = NearDuplicateIndex()
+    index.add(10, SIG, DEPT)
+    other = signature("garbage has not been collected in ward nine for two weeks now")
+    sigs = [other, signature(TEXT + " again"), signature("garbage has not been collected in ward nine for two weeks now!"), SIG]
+    assert index.find_many(sigs, [DEPT] * 4) == [(None, None), (10, None), (None, 0), (10, None)]
+
+
+def test_rebuild_drops_complaints_resolved_meanwhile():
+    index = NearDuplicateIndex()
+
+    def rows():
+        for cid in range(1, 8):
+            if cid == 3:
+                # 1 was already read, 6 is read later: both must end up out of the index
+                index.remove(1)
+                index.remove(6)
+            yield cid, TEXT, DEPT, None if cid == 1 else 1
+
+    assert index.rebuild(rows()) == dedup.CLUSTER_SAMPLE
+    index.remove(2)
+    index.remove(3)
+    index.remove(4)
+    index.remove(5)
+    # only 7 is left open
+    assert index.find(SIG, DEPT).complaint_id == 7
+
+
+def test_rebuild_keeps_complaints_added_meanwhile():
+    index = NearDuplicateIndex()
+
+    def rows():
+        index.add(99, signature("sewage overflowing into the street outside block c"), "Sanitation")
+        yield 1, TEXT, DEPT, None
+
+    index.rebuild(rows())
+    assert index.find(signature("sewage overflowing into the street outside block c"), "Sanitation").complaint_id == 99
+    assert index.find(SIG, DEPT).complaint_id == 1
@@ -0,0 +1,55 @@
+# backend/app/tests/test_idempotency.py
+import uuid
+
+from app import main
+
+
+def unique(prefix):
+    return f"{prefix}-{uuid.uuid4().hex[:12]}"
+
+
+def test_retry_with_header_replays_the_first_complaint(client):
+    key = unique("retry")
+    first = client.post("/analyze", json={"text": "Borewell pump not working"}, headers={"Idempotency-Key": key})
+    again = client.post("/analyze", json={"text": "Borewell pump not working"}, headers={"Idempotency-Key": key})
+    assert first.status_code == again.status_code == 200
+    assert again.json()["id"] == first.json()["id"]
+    assert again.headers.get("Idempotent-Replayed") == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+
+def test_replay_survives_an_empty_key_cache(client):
+    key = unique("cold")
+    cid = client.post("/analyze", json={"text": "Broken footpath tiles", "message_id": key}).json()["id"]
+    main.idempotency_index.clear()
+    assert client.post("/analyze", json={"text": "Broken footpath tiles", "message_id": key}).json()["id"] == cid
+
+
+def test_header_and_message_id_do_not_share_keys(client):
+    key = unique("shared")
+    by_message = client.post("/analyze", json={"text": "Stray dogs near the park", "message_id": key}).json()
+    by_header = client.post("/analyze", json={"text": "Water logging at the junction"}, headers={"Idempotency-Key": key})
+    assert "Idempotent-Replayed" not in by_header.headers
+    assert by_header.json()["id"] != by_message["id"]
+
+
+def test_batch_replays_stored_items(client):
+    key = unique("batch")
+    items = [{"text": "Garbage truck skipped our lane"}, {"text": "Drain cover broken", "message_id": unique("item")}]
+    first = client.post("/analyze/batch", json={"items": items}, headers={"Idempotency-Key": key}).json()
+    again = client.post("/analyze/batch", json={"items": items}, headers={"Idempotency-Key": key}).json()
+    assert first["replayed"] == 0
+    assert again == dict(first, replayed=2)
+
+
+def test_repeated_key_within_a_batch_is_stored_once(client):
+    message_id = unique("dup")
+    items = [{"text": "Low water pressure", "message_id": message_id}] * 2
+    body = client.post("/analyze/batch", json={"items": items}).json()
+    assert body["ids"][0] == body["ids"][1]
+    assert body["replayed"] == 1
+
+
+def test_key_too_long_is_rejected(client):
+    r = client.post("/analyze", json={"text": "x"}, headers={"Idempotency-Key": "k" * (main.CLIENT_KEY_MAX + 1)})
+    assert r.status_code == 422
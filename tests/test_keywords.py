@@ -0,0 +1,45 @@
+# backend/app/tests/test_keywords.py
+"""KeywordMatcher against the per-keyword scans it replaced (kept in benchmarks.bench_keywords)"""
+import random
+
+import pytest
+
+from app import nlp
+from app.benchmarks.bench_keywords import legacy_department, legacy_urgency, make_text, make_unique_text
+
+
+@pytest.mark.parametrize("build", [make_text, make_unique_text])
+def test_matches_legacy_classifier(build):
+    rng = random.Random(7)
+    for _ in range(300):
+        text = build(rng, rng.randint(1, 6))
+        assert nlp.simple_department_from_text(text) == legacy_department(text)
+        assert nlp.predict_urgency(text) == legacy_urgency(text)
+
+
+def test_overlapping_and_nested_keywords():
+    matcher = nlp.KeywordMatcher({"A": ["drain", "drainage"], "B": ["age"], "C": ["rain"]}, ["urgent"])
+    counts, urgent = matcher.scan("blocked drainage")
+    assert counts == {"A": 2, "B": 1, "C": 1}
+    assert not urgent
+
+
+def test_keyword_listed_twice_counts_twice():
+    matcher = nlp.KeywordMatcher({"A": ["leak", "leak"], "B": ["leak"]}, [])
+    assert matcher.scan("pipe leak")[0] == {"A": 2, "B": 1}
+
+
+def test_urgent_words_match_whole_words_only():
+    matcher = nlp.KeywordMatcher({}, ["fire", "danger"])
+    assert matcher.scan("fire near the market")[1]
+    assert not matcher.scan("a bonfire and a dangerous road")[1]
+
+
+def test_reload_keywords_swaps_tables():
+    old_depts, old_urgent = dict(nlp.DEPT_KEYWORDS), list(nlp.URGENT_WORDS)
+    try:
+        version = nlp.reload_keywords({"Parks": ["swing"]}, ["broken"])
+        assert nlp.keywords_version() == version
+        assert nlp.classify_rules("The swing is broken") == ("Parks", "High")
+    finally:
+        nlp.reload_keywords(old_depts, old_urgent)
@@ -0,0 +1,46 @@
+# backend/app/tests/test_lease.py
+import time
+
+import pytest
+
+from app import escalator
+from app.db import init_db
+from app.escalator import Lease
+
+
+@pytest.fixture(params=["upsert", "portable"])
+def lease_mode(request, monkeypatch):
+    """Run each test with the ON CONFLICT upsert and with the UPDATE-then-INSERT fallback"""
+    init_db()
+    if request.param == "portable":
+        monkeypatch.setattr(escalator, "_UPSERT_INSERTS", {})
+    return request.param
+
+
+def test_one_holder_at_a_time(lease_mode):
+    a = Lease(f"test-one-{lease_mode}", ttl=60, holder="a")
+    b = Lease(f"test-one-{lease_mode}", ttl=60, holder="b")
+    assert a.acquire()
+    assert not b.acquire()
+    # renewing keeps it
+    assert a.acquire()
+    assert not b.acquire()
+
+
+def test_expired_lease_is_taken_over(lease_mode):
+    a = Lease(f"test-expiry-{lease_mode}", ttl=0.2, holder="a")
+    b = Lease(f"test-expiry-{lease_mode}", ttl=60, holder="b")
+    assert a.acquire()
+    time.sleep(0.3)
+    assert b.acquire()
+    assert not a.acquire()
+    assert not a.held
+
+
+def test_release_hands_over_at_once(lease_mode):
+    a = Lease(f"test-release-{lease_mode}", ttl=60, holder="a")
+    b = Lease(f"test-release-{lease_mode}", ttl=60, holder="b")
+    assert a.acquire()
+    a.release()
+    assert not a.held
+    assert b.acquire()
@@ -0,0 +1,42 @@
+# backend/app/tests/test_read_cache.py
+from app import main
+
+
+def test_repeat_read_is_served_from_cache_with_etag(client):
+    first = client.get("/complaints", params={"limit": 5})
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["X-Table-Epoch"] == main.feed.epoch
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    hits = main.read_cache.hits
+    again = client.get("/complaints", params={"limit": 5})
+    assert again.content == first.content and again.headers["ETag"] == etag
+    assert main.read_cache.hits == hits + 1
+
+    not_modified = client.get("/complaints", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+
+
+def test_write_moves_the_table_version(client):
+    before = client.get("/complaints", params={"limit": 5})
+    created = client.post("/analyze", json={"text": "Open manhole on the service road, cover missing"}).json()
+
+    after = client.get("/complaints", params={"limit": 5}, headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert int(after.headers["X-Table-Version"]) > int(before.headers["X-Table-Version"])
+    assert after.json()[0]["id"] == created["id"]
+
+
+def test_status_change_is_visible_on_the_next_read(client):
+    cid = client.post("/analyze", json={"text": "Transformer sparking near bus depot"}).json()["id"]
+    assert client.get(f"/complaints/{cid}").json()["status"] != "resolved"
+
+    r = client.post(f"/complaints/{cid}/update_status", params={"status": "resolved"})
+    assert r.status_code == 200
+    assert client.get(f"/complaints/{cid}").json()["status"] == "resolved"
+
+
+def test_missing_complaint_is_404(client):
+    assert client.get("/complaints/999999999").status_code == 404